@@ -0,0 +1,258 @@
+"""
+Benchmarks de bbox_utils et de la chaîne d'extraction, sur des données
+synthétiques reproductibles.
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --compare bench.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import statistics
+
+import cv2
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+from utils import bbox_utils
+from utils.bbox_utils import (
+    create_overlay,
+    render_overlay,
+    filter_contours,
+    filter_contained_boxes,
+    filter_contained_boxes_vectorized,
+    extract_boxes
+)
+from utils.batch import load_and_extract
+from utils.journal import ValidationJournal, export_results
+from synthetic import make_frame, make_mask, make_boxes, write_dataset
+
+def measure(func, repeat=5, warmup=1):
+    """
+    Mesure le temps d'exécution de func.
+
+    Returns:
+        Dictionnaire des statistiques en millisecondes
+    """
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "mean_ms": statistics.mean(timings),
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "repeat": repeat
+    }
+
+def bench_overlay(args, results):
+    """Superposition du masque : deux create_overlay contre render_overlay"""
+    frame = make_frame(args.width, args.height)
+    mask = make_mask(args.width, args.height, args.blobs, args.speckles, args.nesting)
+    results["create_overlay_x2"] = measure(
+        lambda: create_overlay(create_overlay(frame, mask, (0, 0, 255), 0.3), ~mask, (0, 255, 0), 0.3),
+        args.repeat)
+    results["render_overlay"] = measure(lambda: render_overlay(frame, mask, 0.3), args.repeat)
+
+def bench_contours(args, results):
+    """Filtrage des contours par aire"""
+    mask = make_mask(args.width, args.height, args.blobs, args.speckles, args.nesting)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    results["filter_contours"] = measure(lambda: filter_contours(contours, 100), args.repeat)
+    results["filter_contours"]["contours"] = len(contours)
+
+def bench_filter_boxes(args, results):
+    """Filtrage des boxes contenues, pour un nombre croissant de boxes"""
+    threshold = bbox_utils.VECTORIZED_FILTER_MIN_BOXES
+    for count in args.box_counts:
+        boxes = make_boxes(count, args.width, args.height)
+        # Boucle Python seule, quel que soit le nombre de boxes
+        bbox_utils.VECTORIZED_FILTER_MIN_BOXES = float('inf')
+        try:
+            results[f"filter_contained_boxes[loop,n={count}]"] = measure(
+                lambda: filter_contained_boxes(boxes), args.repeat)
+        finally:
+            bbox_utils.VECTORIZED_FILTER_MIN_BOXES = threshold
+        results[f"filter_contained_boxes[vectorized,n={count}]"] = measure(
+            lambda: filter_contained_boxes_vectorized(boxes), args.repeat)
+
+def bench_extraction(args, results):
+    """Extraction complète d'une image : lecture, redimensionnement, boxes"""
+    mask = make_mask(args.width, args.height, args.blobs, args.speckles, args.nesting)
+    for backend in ("contours", "components"):
+        results[f"extract_boxes[{backend}]"] = measure(
+            lambda: extract_boxes(mask, 100, backend=backend), args.repeat)
+
+    with tempfile.TemporaryDirectory() as root:
+        image_dir, mask_dir = write_dataset(root, scans=1, frames=1, width=args.width, height=args.height,
+                                            blobs=args.blobs, speckles=args.speckles, nesting=args.nesting)
+        img_path = os.path.join(image_dir, "scan_000", "00000.png")
+        mask_path = os.path.join(mask_dir, "scan_000", "00000.png")
+        task = ("scan_000", "00000.png", img_path, mask_path, {"min_area": 100})
+        results["load_and_extract"] = measure(lambda: load_and_extract(task), args.repeat)
+
+def bench_save(args, results):
+    """Enregistrement d'une décision et export, pour un nombre croissant d'annotations"""
+    boxes = make_boxes(2, args.width, args.height)
+    with tempfile.TemporaryDirectory() as root:
+        for count in args.annotation_counts:
+            journal_file = os.path.join(root, f"journal_{count}.jsonl")
+            journal = ValidationJournal(journal_file)
+            for i in range(count):
+                journal.append(f"scan_{i // 1000:03d}", f"{i % 1000:05d}.png", True, boxes)
+
+            counter = iter(range(count, count + 10 ** 6))
+            results[f"journal_append[n={count}]"] = measure(
+                lambda: journal.append("scan_new", f"{next(counter):05d}.png", True, boxes),
+                args.repeat)
+            journal.close()
+
+            outputs = [os.path.join(root, name) for name in ("out.json", "out.csv", "fix.txt", "val.json")]
+            results[f"export_results[n={count}]"] = measure(
+                lambda: export_results(journal_file, *outputs), max(1, args.repeat // 2))
+
+# Objectif de démarrage : fenêtre utilisable en moins d'une seconde
+STARTUP_TARGET_MS = 1000
+
+# Exécuté dans un nouveau processus : import de main, puis création et
+# premier affichage de la fenêtre (si un écran est disponible)
+STARTUP_SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import main
+timings = {"import_main": time.perf_counter() - start}
+try:
+    app = main.BBoxApp()
+except Exception:
+    print(json.dumps(timings))
+    sys.exit(0)
+app.gui.show_status("")
+app.root.update()
+timings["window"] = time.perf_counter() - start
+app.root.destroy()
+print(json.dumps(timings))
+"""
+
+def bench_startup(args, results):
+    """
+    Démarrage de l'interface dans un nouveau processus : import des modules
+    et affichage de la fenêtre, avant le chargement du dataset.
+    """
+    samples = {"process": [], "import_main": [], "window": []}
+    with tempfile.TemporaryDirectory() as root:
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, os.path.abspath(SRC_DIR)],
+                                    cwd=root, capture_output=True, text=True, check=True).stdout
+            elapsed = (time.perf_counter() - start) * 1000
+            timings = json.loads(output.strip().splitlines()[-1])
+            if "window" in timings:
+                samples["process"].append(elapsed)
+            for name, seconds in timings.items():
+                samples[name].append(seconds * 1000)
+
+    for name, timings in samples.items():
+        if not timings:
+            print(f"startup[{name}]: pas d'écran disponible, mesure ignorée")
+            continue
+        results[f"startup[{name}]"] = {
+            "mean_ms": statistics.mean(timings),
+            "median_ms": statistics.median(timings),
+            "min_ms": min(timings),
+            "repeat": len(timings)
+        }
+    window = results.get("startup[window]")
+    if window is not None and window["median_ms"] > STARTUP_TARGET_MS:
+        print(f"startup[window]: {window['median_ms']:.0f} ms, objectif {STARTUP_TARGET_MS} ms dépassé")
+
+BENCHMARKS = {
+    "overlay": bench_overlay,
+    "contours": bench_contours,
+    "filter_boxes": bench_filter_boxes,
+    "extraction": bench_extraction,
+    "save": bench_save,
+    "startup": bench_startup
+}
+
+def compare(results, baseline_file, tolerance):
+    """
+    Compare les résultats à un fichier de référence.
+
+    Returns:
+        Liste des benchmarks plus lents que la référence au-delà de la tolérance
+    """
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        ratio = stats["median_ms"] / max(baseline[name]["median_ms"], 1e-9)
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = "  <-- régression"
+        print(f"{name:50s} {baseline[name]['median_ms']:10.3f} ms -> {stats['median_ms']:10.3f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+def parse_args():
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Benchmarks de la chaîne d'extraction")
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--blobs', type=int, default=3, help="Nombre de lésions par masque")
+    parser.add_argument('--speckles', type=int, default=200, help="Nombre de composantes parasites")
+    parser.add_argument('--nesting', type=int, default=2, help="Niveaux d'imbrication par lésion")
+    parser.add_argument('--box-counts', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--annotation-counts', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Benchmarks à lancer")
+    parser.add_argument('--output', help="Fichier JSON des résultats")
+    parser.add_argument('--compare', help="Fichier JSON de référence")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Ralentissement accepté avant de signaler une régression")
+    return parser.parse_args()
+
+def main():
+    """Lance les benchmarks"""
+    args = parse_args()
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"{name}...")
+        BENCHMARKS[name](args, results)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "params": {key: value for key, value in vars(args).items()
+                       if key not in ("output", "compare", "only")}
+        },
+        "results": results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
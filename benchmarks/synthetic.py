@@ -0,0 +1,90 @@
+import os
+import cv2
+import numpy as np
+
+def make_frame(width=1280, height=720, seed=0):
+    """
+    Image BGR synthétique (dégradé bruité, proche d'une échographie).
+    """
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 160, width, dtype=np.float32)[None, :].repeat(height, axis=0)
+    noise = rng.normal(0, 25, (height, width)).astype(np.float32)
+    gray = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+def make_mask(width=1280, height=720, blobs=3, speckles=0, nesting=0, seed=0):
+    """
+    Masque binaire synthétique.
+
+    Args:
+        width, height: Résolution du masque
+        blobs: Nombre de lésions (ellipses pleines)
+        speckles: Nombre de petites composantes parasites (rayon 1 à 4 pixels)
+        nesting: Niveaux d'imbrication dans chaque lésion (trou, puis objet
+            dans le trou, etc.)
+        seed: Graine du générateur aléatoire
+    """
+    rng = np.random.default_rng(seed)
+    mask = np.zeros((height, width), dtype=np.uint8)
+    max_axis = max(8, min(width, height) // 6)
+
+    for _ in range(blobs):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        axes = (int(rng.integers(max_axis // 2, max_axis)), int(rng.integers(max_axis // 2, max_axis)))
+        angle = float(rng.uniform(0, 180))
+        cv2.ellipse(mask, center, axes, angle, 0, 360, 255, -1)
+
+        # Alternance trou / objet vers le centre de la lésion
+        for level in range(1, nesting + 1):
+            scale = 1 - level / (nesting + 1)
+            inner = (max(1, int(axes[0] * scale)), max(1, int(axes[1] * scale)))
+            color = 0 if level % 2 else 255
+            cv2.ellipse(mask, center, inner, angle, 0, 360, color, -1)
+
+    for _ in range(speckles):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        cv2.circle(mask, center, int(rng.integers(1, 5)), 255, -1)
+
+    return mask
+
+def make_boxes(count, width=1280, height=720, max_size=64, seed=0):
+    """
+    Liste de bounding boxes aléatoires (format de filter_contained_boxes).
+    """
+    rng = np.random.default_rng(seed)
+    boxes = []
+    for _ in range(count):
+        w = int(rng.integers(1, max_size))
+        h = int(rng.integers(1, max_size))
+        boxes.append({
+            "x": int(rng.integers(0, width - w)),
+            "y": int(rng.integers(0, height - h)),
+            "width": w,
+            "height": h
+        })
+    return boxes
+
+def write_dataset(root, scans=2, frames=10, width=1280, height=720, mask_scale=0.5, **mask_kwargs):
+    """
+    Écrit un dataset synthétique (images et masques, un dossier par scan).
+
+    Les masques sont écrits à mask_scale de la résolution des images, comme
+    dans le dataset BUV où ils sont redimensionnés à la lecture.
+
+    Returns:
+        Tuple (dossier des images, dossier des masques)
+    """
+    image_dir = os.path.join(root, "rawframes")
+    mask_dir = os.path.join(root, "masks")
+    mask_size = (max(1, int(width * mask_scale)), max(1, int(height * mask_scale)))
+    for scan in range(scans):
+        scan_folder = f"scan_{scan:03d}"
+        os.makedirs(os.path.join(image_dir, scan_folder), exist_ok=True)
+        os.makedirs(os.path.join(mask_dir, scan_folder), exist_ok=True)
+        for frame in range(frames):
+            seed = scan * frames + frame
+            img_name = f"{frame:05d}.png"
+            cv2.imwrite(os.path.join(image_dir, scan_folder, img_name), make_frame(width, height, seed))
+            mask = make_mask(mask_size[0], mask_size[1], seed=seed, **mask_kwargs)
+            cv2.imwrite(os.path.join(mask_dir, scan_folder, img_name), mask)
+    return image_dir, mask_dir
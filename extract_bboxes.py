@@ -1,8 +1,8 @@
 import os
 import cv2
 import json
+import csv
 import numpy as np
-import pandas as pd
 from pathlib import Path
 
 # Ajout des textes multilingues
@@ -357,22 +357,14 @@ def extract_bboxes(image_base_dir, mask_base_dir, output_json="bounding_boxes.js
 
     cv2.destroyAllWindows()
 
-    # Création du DataFrame avec toutes les boxes
-    df_rows = []
-    for img_path, boxes in bounding_boxes.items():
-        scan_folder, img_name = img_path.split('/')
-        for box in boxes:
-            df_rows.append({
-                'scan_folder': scan_folder,
-                'image_name': img_name,
-                'x': box['x'],
-                'y': box['y'],
-                'width': box['width'],
-                'height': box['height']
-            })
-    
-    df = pd.DataFrame(df_rows)
-    df.to_csv(output_csv, index=False)
+    # Écriture du CSV avec toutes les boxes (une ligne par box)
+    with open(output_csv, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['scan_folder', 'image_name', 'x', 'y', 'width', 'height'])
+        for img_path, boxes in bounding_boxes.items():
+            scan_folder, img_name = img_path.split('/')
+            for box in boxes:
+                writer.writerow([scan_folder, img_name, box['x'], box['y'], box['width'], box['height']])
 
     print(f"\n{TEXTS[current_lang]['finished']} {len(bounding_boxes)} {TEXTS[current_lang]['saved_boxes']} {total_images} {TEXTS[current_lang]['processed_images']}.")
     print(f"{len(bad_cases)} {TEXTS[current_lang]['manual_fix']} '{bad_cases_file}'.")
@@ -0,0 +1,84 @@
+import os
+import argparse
+
+from config import *
+from utils.texts import TEXTS
+from utils.batch import STATUS_OK, MASK_REDUCTIONS, iter_boxes, write_results
+from utils.journal import ValidationJournal
+from utils.bbox_utils import EXTRACTION_BACKENDS
+from utils.box_store import BoxStore
+from utils.manifest import parse_shard
+from utils import metrics
+
+def parse_args():
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(
+        description="Extraction des bounding boxes sans interface, sur tous les cœurs"
+    )
+    parser.add_argument('--images', default=IMAGE_BASE_DIR, help="Dossier des images")
+    parser.add_argument('--masks', default=MASK_BASE_DIR, help="Dossier des masques")
+    parser.add_argument('--min-area', type=int, default=MIN_AREA, help="Aire minimale d'un contour")
+    parser.add_argument('--threshold', type=int, default=MASK_THRESHOLD, help="Seuil de binarisation du masque")
+    parser.add_argument('--backend', choices=EXTRACTION_BACKENDS, default=EXTRACTION_BACKEND,
+                        help="Méthode d'extraction des boxes")
+    parser.add_argument('--mask-reduction', type=int, choices=sorted(MASK_REDUCTIONS), default=MASK_REDUCTION,
+                        help="Décode les masques à 1/N de la résolution (plus rapide, boxes approchées)")
+    parser.add_argument('--shard', type=parse_shard, default=SHARD,
+                        help="Partition i/N des scans à traiter (par hachage stable du nom du scan)")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus (défaut : un par cœur, 0 : sans processus)")
+    parser.add_argument('--output-json', default=OUTPUT_JSON)
+    parser.add_argument('--output-csv', default=OUTPUT_CSV)
+    parser.add_argument('--bad-cases', default=BAD_CASES_FILE)
+    parser.add_argument('--journal', default=None,
+                        help="Écrit aussi les résultats en journal de décisions (images rejetées comprises), "
+                             "à fusionner avec merge.py ; avec --shard, <output-json>.jsonl par défaut")
+    args = parser.parse_args()
+    if args.journal is None and args.shard:
+        args.journal = os.path.splitext(args.output_json)[0] + '.jsonl'
+    return args
+
+def main():
+    """Lance l'extraction en lot"""
+    args = parse_args()
+    lang = DEFAULT_LANGUAGE
+    metrics.enable(METRICS)
+
+    params = {"min_area": args.min_area, "threshold": args.threshold, "backend": args.backend}
+    if args.mask_reduction > 1:
+        params["mask_reduction"] = args.mask_reduction
+    
+    bounding_boxes = {}
+    bad_cases = []
+    store = BoxStore()
+    total_images = 0
+    journal = open(args.journal, 'w', encoding='utf-8') if args.journal else None
+
+    try:
+        for result in iter_boxes(args.images, args.masks, params, args.workers,
+                                 manifest_file=MANIFEST_FILE, cache_file=BOX_CACHE_FILE, dedup=DEDUP,
+                                 shard=args.shard):
+            total_images += 1
+            scan_folder, img_name = result.key.split('/', 1)
+            if result.status == STATUS_OK:
+                bounding_boxes[result.key] = result.boxes
+                store.append(scan_folder, img_name, result.boxes)
+            else:
+                print(f"{TEXTS[lang][result.status]}: {result.key}")
+                bad_cases.append(result.key)
+            if journal is not None:
+                journal.write(ValidationJournal.record(scan_folder, img_name, result.status == STATUS_OK,
+                                                       result.boxes))
+    finally:
+        if journal is not None:
+            journal.close()
+
+    with metrics.timer('save_results'):
+        write_results(bounding_boxes, bad_cases, args.output_json, args.output_csv, args.bad_cases,
+                      store, RESULTS_STORE_DIR)
+    metrics.dump(METRICS_FILE)
+
+    print(f"\n{TEXTS[lang]['finished']} {len(bounding_boxes)} {TEXTS[lang]['saved_boxes']} {total_images} {TEXTS[lang]['processed_images']}.")
+    print(f"{len(bad_cases)} {TEXTS[lang]['manual_fix']} '{args.bad_cases}'.")
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,67 @@ load_dotenv()
 IMAGE_BASE_DIR = os.getenv('IMAGE_BASE_DIR', 'Miccai 2022 BUV Dataset/rawframes/benign')
 MASK_BASE_DIR = os.getenv('MASK_BASE_DIR', 'masks/benign')
 
+# Partition du dataset traitée sur cette machine ("i/N", vide pour tout
+# traiter) ; les scans sont répartis par hachage stable de leur nom
+SHARD = os.getenv('SHARD', '')
+
 # Paramètres de traitement
 MIN_AREA = int(os.getenv('MIN_AREA', 100))
+MASK_THRESHOLD = int(os.getenv('MASK_THRESHOLD', 127))
+# 'contours' (findContours, aire du contour) ou 'components'
+# (connectedComponentsWithStats, aire en pixels) ; voir utils/bbox_utils.py
+EXTRACTION_BACKEND = os.getenv('EXTRACTION_BACKEND', 'contours')
+EXTRACTION_PARAMS = {"min_area": MIN_AREA, "threshold": MASK_THRESHOLD, "backend": EXTRACTION_BACKEND}
+# Extraction sans interface : décodage du masque à 1/MASK_REDUCTION de la
+# résolution (1, 2, 4 ou 8), boxes remises à l'échelle de l'image
+MASK_REDUCTION = int(os.getenv('MASK_REDUCTION', 1))
 OUTPUT_JSON = os.getenv('OUTPUT_JSON', 'bounding_boxes.json')
 OUTPUT_CSV = os.getenv('OUTPUT_CSV', 'bounding_boxes.csv')
 BAD_CASES_FILE = os.getenv('BAD_CASES_FILE', 'to_fix.txt')
+# Stockage en colonnes des boxes (.npy relisibles par memory mapping, vide pour désactiver)
+RESULTS_STORE_DIR = os.getenv('RESULTS_STORE_DIR', 'bounding_boxes_store')
+VALIDATIONS_FILE = os.getenv('VALIDATIONS_FILE', 'validations.json')
+JOURNAL_FILE = os.getenv('JOURNAL_FILE', 'validations.jsonl')
+MANIFEST_FILE = os.getenv('MANIFEST_FILE', 'dataset_manifest.json')
+# Cache des boxes extraites (vide pour désactiver)
+BOX_CACHE_FILE = os.getenv('BOX_CACHE_FILE', 'boxes_cache.sqlite')
+
+# Déduplication des masques identiques d'un même scan (images consécutives)
+DEDUP = os.getenv('DEDUP', '1') == '1'
+# Reprendre la décision de l'image précédente quand le masque est identique
+DEDUP_CARRY_DECISIONS = os.getenv('DEDUP_CARRY_DECISIONS', '0') == '1'
+
+# Validation automatique des images dont le score de triage (0 à 1, voir
+# utils/triage.py) atteint ce seuil ; 0 pour tout faire relire
+AUTO_ACCEPT_THRESHOLD = float(os.getenv('AUTO_ACCEPT_THRESHOLD', 0))
+
+# Reprise de la session précédente à partir du journal
+RESUME = os.getenv('RESUME', '1') == '1'
+# Les décisions sont écrites par un thread dédié ; export JSON/CSV après
+# AUTOSAVE_DELAY secondes sans nouvelle décision (0 : seulement sur Ctrl+S
+# et à la fermeture)
+AUTOSAVE_DELAY = float(os.getenv('AUTOSAVE_DELAY', 5))
 
 # Paramètres d'affichage
 DEFAULT_LANGUAGE = os.getenv('DEFAULT_LANGUAGE', 'fr')
-DEFAULT_ALPHA = float(os.getenv('DEFAULT_ALPHA', 0.3)) 
\ No newline at end of file
+DEFAULT_ALPHA = float(os.getenv('DEFAULT_ALPHA', 0.3))
+
+# Mesure des temps par étape (METRICS=1) ; fichier .prom pour le format
+# texte Prometheus, JSON sinon
+METRICS = os.getenv('METRICS', '0') == '1'
+METRICS_FILE = os.getenv('METRICS_FILE', 'metrics.json')
+
+# Serveur de relecture partagé (src/server.py) ; une image prêtée à un
+# relecteur lui est reprise après LEASE_TIMEOUT secondes sans décision
+SERVER_HOST = os.getenv('SERVER_HOST', '127.0.0.1')
+SERVER_PORT = int(os.getenv('SERVER_PORT', 8765))
+LEASE_TIMEOUT = int(os.getenv('LEASE_TIMEOUT', 300))
+
+# Relecture par grille de vignettes (src/grid.py) et cache disque des vignettes
+GRID_COLUMNS = int(os.getenv('GRID_COLUMNS', 4))
+THUMBNAIL_SIZE = int(os.getenv('THUMBNAIL_SIZE', 160))
+THUMBNAIL_DIR = os.getenv('THUMBNAIL_DIR', 'thumbnails')
+
+# Préchargement des images suivantes dans l'interface
+PREFETCH_DEPTH = int(os.getenv('PREFETCH_DEPTH', 8))
+PREFETCH_WORKERS = int(os.getenv('PREFETCH_WORKERS', 2))
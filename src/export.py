@@ -0,0 +1,29 @@
+import argparse
+
+from config import *
+from utils.texts import TEXTS
+from utils.journal import export_results
+
+def parse_args():
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Export des résultats à partir du journal des décisions")
+    parser.add_argument('--npz', help="Exporte aussi les boxes dans une archive .npz")
+    parser.add_argument('--parquet', help="Exporte aussi les boxes en Parquet (nécessite pyarrow)")
+    return parser.parse_args()
+
+def main():
+    """Produit les fichiers JSON/CSV à partir du journal des décisions"""
+    args = parse_args()
+    lang = DEFAULT_LANGUAGE
+    bounding_boxes, bad_cases, store = export_results(JOURNAL_FILE, OUTPUT_JSON, OUTPUT_CSV, BAD_CASES_FILE,
+                                                      VALIDATIONS_FILE, RESULTS_STORE_DIR)
+    if args.npz:
+        store.export_npz(args.npz)
+    if args.parquet:
+        store.export_parquet(args.parquet)
+
+    print(f"{TEXTS[lang]['finished']} {len(bounding_boxes)} -> '{OUTPUT_JSON}', '{OUTPUT_CSV}'.")
+    print(f"{len(bad_cases)} {TEXTS[lang]['manual_fix']} '{BAD_CASES_FILE}'.")
+
+if __name__ == "__main__":
+    main()
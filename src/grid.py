@@ -0,0 +1,140 @@
+import argparse
+import tkinter as tk
+from tkinter import messagebox
+
+import config
+from config import *
+from utils.texts import TEXTS
+from utils.batch import STATUS_OK
+from utils.manifest import DatasetManifest, parse_shard
+from utils.journal import ValidationJournal, AsyncJournal, seed_journal, resume_manifest, export_configured
+from utils.thumbnails import ThumbnailCache, ThumbnailPager
+from utils.box_cache import BoxCache
+from utils.dedup import FingerprintMemo
+from utils.grid_gui import GridGUI
+from utils import metrics
+
+class GridApp:
+    """
+    Relecture par pages de vignettes : toute la page est validée d'un coup,
+    sauf les images marquées, qui sont rejetées.
+    """
+    def __init__(self, columns=GRID_COLUMNS, thumbnail_size=THUMBNAIL_SIZE):
+        metrics.enable(METRICS)
+        self.root = tk.Tk()
+        self.gui = GridGUI(self.root, columns, on_accept=self.accept_page, on_quit=self.quit_app,
+                           on_save=self.save_results)
+        self.columns = columns
+        self.thumbnail_size = thumbnail_size
+        self.lang = DEFAULT_LANGUAGE
+        self.tiles = []
+        self.page_number = 0
+        self.manifest = None
+        self.pager = None
+        self.box_cache = None
+        self.journal = None
+
+    def run(self):
+        """Affiche la fenêtre, puis charge le dataset au premier passage de la boucle Tk"""
+        self.gui.show_status(TEXTS[self.lang]['loading'])
+        self.root.update()
+        self.root.after(0, self.start)
+        self.root.mainloop()
+
+    def start(self):
+        """Charge le journal, l'index du dataset et la première page"""
+        seed_journal(JOURNAL_FILE, VALIDATIONS_FILE, OUTPUT_JSON)
+        self.journal = AsyncJournal(ValidationJournal(JOURNAL_FILE), lambda: export_configured(config),
+                                    AUTOSAVE_DELAY)
+        self.manifest = DatasetManifest(IMAGE_BASE_DIR, MASK_BASE_DIR, MANIFEST_FILE, parse_shard(SHARD))
+        if BOX_CACHE_FILE:
+            self.box_cache = BoxCache(BOX_CACHE_FILE)
+        if RESUME:
+            resume_manifest(JOURNAL_FILE, self.manifest)
+
+        thumbnails = ThumbnailCache(THUMBNAIL_DIR, EXTRACTION_PARAMS, self.thumbnail_size, DEFAULT_ALPHA)
+        self.pager = ThumbnailPager(
+            self.manifest.iter_pending(EXTRACTION_PARAMS),
+            thumbnails,
+            page_size=self.columns * self.columns,
+            workers=PREFETCH_WORKERS,
+            cache=self.box_cache,
+            memo=FingerprintMemo() if DEDUP else None
+        )
+        self.next_page()
+
+    def record(self, tile, valid):
+        """Enregistre la décision sur une image de la page"""
+        key_str = f"{tile['scan']}/{tile['image_name']}"
+        self.manifest.mark(key_str)
+        self.journal.append(tile["scan"], tile["image_name"], valid, tile["boxes"] if valid else None)
+
+    def next_page(self):
+        """Affiche la prochaine page (les images illisibles sont rejetées au passage)"""
+        for page in self.pager:
+            self.tiles = []
+            for tile in page:
+                if tile["status"] != STATUS_OK:
+                    print(f"{TEXTS[self.lang][tile['status']]}: {tile['scan']}/{tile['image_name']}")
+                    self.record(tile, False)
+                    continue
+                self.tiles.append(tile)
+            if not self.tiles:
+                continue
+            self.report_journal_error()
+            self.page_number += 1
+            scans = sorted({tile["scan"] for tile in self.tiles})
+            self.gui.show_page([tile["thumbnail"] for tile in self.tiles],
+                               f"Page {self.page_number} | {TEXTS[self.lang]['scan']}: {', '.join(scans)}")
+            return
+
+        messagebox.showinfo("Terminé", "Toutes les images ont été traitées.")
+        self.quit_app()
+
+    def report_journal_error(self):
+        """Signale une écriture du journal ou un export en échec (thread d'écriture)"""
+        error = self.journal.take_error()
+        if error is not None:
+            messagebox.showwarning("Journal", f"{TEXTS[self.lang]['journal_error']} {error}")
+
+    def accept_page(self, marked):
+        """Valide la page, sauf les images marquées qui sont rejetées"""
+        with metrics.timer('journal_append'):
+            for index, tile in enumerate(self.tiles):
+                self.record(tile, index not in marked)
+        metrics.count('frames_validated', len(self.tiles) - len(marked))
+        metrics.count('frames_rejected', len(marked))
+        self.next_page()
+
+    def save_results(self):
+        """Demande l'export des résultats en JSON/CSV (fait en arrière-plan)"""
+        if self.journal is None:
+            return
+        self.journal.save()
+
+    def quit_app(self):
+        """Quitte l'application (la page affichée reste à traiter)"""
+        if self.pager is not None:
+            self.pager.close()
+        if self.box_cache is not None:
+            self.box_cache.close()
+        if self.journal is not None:
+            # Écrit les dernières décisions et exporte les résultats
+            try:
+                self.journal.close()
+            except OSError as e:
+                messagebox.showerror("Journal", f"{TEXTS[self.lang]['journal_error']} {e}")
+        self.root.quit()
+        self.root.destroy()
+
+def parse_args():
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Validation des bounding boxes par grille de vignettes")
+    parser.add_argument('--columns', type=int, default=GRID_COLUMNS, help="Grille de N x N vignettes")
+    parser.add_argument('--size', type=int, default=THUMBNAIL_SIZE, help="Taille des vignettes, en pixels")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    app = GridApp(args.columns, args.size)
+    app.run()
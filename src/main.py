@@ -1,39 +1,40 @@
-import os
-import cv2
-import json
-import numpy as np
-import pandas as pd
-from pathlib import Path
 import tkinter as tk
 from tkinter import messagebox
 
+import config
 from config import *
 from utils.texts import TEXTS
-from utils.bbox_utils import (
-    create_overlay,
-    filter_contours,
-    filter_contained_boxes
-)
+from utils import metrics
 from utils.gui import BBoxGUI
 
+# Les modules de traitement (OpenCV, NumPy, PIL) sont importés à la première
+# utilisation, après l'affichage de la fenêtre (voir BBoxApp.start)
+
 class BBoxApp:
     def __init__(self):
+        metrics.enable(METRICS)
         self.root = tk.Tk()
         self.gui = BBoxGUI(
             self.root,
             on_validate=self.validate_box,
             on_reject=self.reject_box,
             on_quit=self.quit_app,
-            on_save=self.save_results
+            on_save=self.save_results,
+            on_render=self.request_render
         )
         
         # Variables d'état
         self.bounding_boxes = {}
         self.bad_cases = []
-        self.validations = []
         self.current_image = None
         self.current_mask = None
         self.current_boxes = None
+        self.current_frame = None
+        self.manifest = None
+        self.prefetcher = None
+        self.box_cache = None
+        self.last_decision = None
+        self.triage = None
         self.current_scan = None
         self.current_img_name = None
         self.is_running = True
@@ -41,201 +42,279 @@ class BBoxApp:
         # Variables de cache pour les calculs
         self.last_alpha = None
         self.last_mask_state = None
-        self.last_image_hash = None
+        self.last_display_size = None
+        self.overlay_cache = {}
+        self.render_pending = False
+        self.journal = None
         
-        # Chargement des validations existantes
-        if os.path.exists("validations.json"):
-            with open("validations.json", 'r', encoding='utf-8') as f:
-                self.validations = json.load(f)
-                
         # Variables de contrôle
         self.validation_var = tk.BooleanVar()
         self.validation_var.set(False)
-        
-        # Configuration de la mise à jour automatique
-        self.update_interval = 800 #ms
-        self.root.after(self.update_interval, self.update_interface)
                 
     def run(self):
-        """Lance l'application"""
-        self.process_next_image()
+        """
+        Lance l'application : la fenêtre s'affiche tout de suite, le dataset
+        et l'historique sont chargés au premier passage de la boucle Tk.
+        """
+        self.gui.show_status(TEXTS[self.gui.current_lang]['loading'])
+        self.root.update()
+        self.root.after(0, self.start)
         self.root.mainloop()
         
+    def start(self):
+        """Charge le journal, l'index du dataset et la première image"""
+        from utils.manifest import DatasetManifest, parse_shard
+        from utils.journal import ValidationJournal, AsyncJournal, seed_journal, export_configured
+        from utils.prefetch import FramePrefetcher
+        from utils.box_cache import BoxCache
+        from utils.dedup import FingerprintMemo
+        from utils.triage import AutoTriage
+        
+        # Journal des décisions (repris de validations.json au premier lancement)
+        seed_journal(JOURNAL_FILE, VALIDATIONS_FILE, OUTPUT_JSON)
+        self.journal = AsyncJournal(ValidationJournal(JOURNAL_FILE), lambda: export_configured(config),
+                                    AUTOSAVE_DELAY)
+        
+        self.manifest = DatasetManifest(IMAGE_BASE_DIR, MASK_BASE_DIR, MANIFEST_FILE, parse_shard(SHARD))
+        if BOX_CACHE_FILE:
+            self.box_cache = BoxCache(BOX_CACHE_FILE)
+        if RESUME:
+            self.resume()
+        if AUTO_ACCEPT_THRESHOLD > 0:
+            self.triage = AutoTriage(AUTO_ACCEPT_THRESHOLD)
+            
+        self.prefetcher = FramePrefetcher(
+            self.manifest.iter_pending(EXTRACTION_PARAMS),
+            depth=PREFETCH_DEPTH,
+            workers=PREFETCH_WORKERS,
+            alpha=self.gui.current_alpha,
+            cache=self.box_cache,
+            memo=FingerprintMemo() if DEDUP else None,
+            signals=self.triage is not None
+        )
+        self.process_next_image()
+        
+    def resume(self):
+        """
+        Restaure les décisions déjà enregistrées dans le journal et place le
+        parcours du dataset sur la première image non traitée.
+        """
+        from utils.journal import resume_manifest
+        self.bounding_boxes, self.bad_cases, _ = resume_manifest(JOURNAL_FILE, self.manifest)
+        
     def process_next_image(self):
         """Traite la prochaine image"""
+        from utils.batch import STATUS_OK
         if not self.is_running:
             return
             
-        # Trouver la prochaine image à traiter
-        for scan_folder in os.listdir(IMAGE_BASE_DIR):
-            scan_path = os.path.join(IMAGE_BASE_DIR, scan_folder)
-            if not os.path.isdir(scan_path):
+        # Les images suivantes sont préparées en arrière-plan
+        for frame in self.prefetcher:
+            scan_folder = frame["scan"]
+            img_name = frame["image_name"]
+            key_str = f"{scan_folder}/{img_name}"
+            
+            if frame["status"] != STATUS_OK:
+                print(f"{TEXTS[self.gui.current_lang][frame['status']]}: {scan_folder}/{img_name}")
+                self.bad_cases.append(key_str)
+                self.manifest.mark(key_str)
+                self.journal.append(scan_folder, img_name, False)
+                # Image différente entre deux masques identiques : pas de reprise
+                self.last_decision = None
                 continue
                 
-            for img_name in sorted(os.listdir(scan_path)):
-                if not img_name.endswith(('.png', '.jpg', '.jpeg')):
-                    continue
-                    
-                key_str = f"{scan_folder}/{img_name}"
-                if key_str in self.bounding_boxes or key_str in self.bad_cases:
-                    continue
-                    
-                self.current_scan = scan_folder
-                self.current_img_name = img_name
-                
-                img_path = os.path.join(scan_path, img_name)
-                mask_path = os.path.join(MASK_BASE_DIR, scan_folder, img_name)
-                
-                self.current_image = cv2.imread(img_path)
-                self.current_mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
-                
-                if self.current_image is None or self.current_mask is None:
-                    print(f"{TEXTS[self.gui.current_lang]['read_error']}: {scan_folder}/{img_name}")
-                    self.bad_cases.append(key_str)
-                    self.validations.append({"scan": scan_folder, "image": img_name, "valid": False})
-                    continue
-                    
-                # Redimensionner le masque
-                self.current_mask = cv2.resize(self.current_mask, 
-                                             (self.current_image.shape[1], self.current_image.shape[0]),
-                                             interpolation=cv2.INTER_NEAREST)
-                _, mask_bin = cv2.threshold(self.current_mask, 127, 255, cv2.THRESH_BINARY)
-                
-                # Détection et filtrage des contours
-                contours, _ = cv2.findContours(mask_bin, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                filtered_contours = filter_contours(contours, MIN_AREA)
-                
-                if not filtered_contours:
-                    print(f"{TEXTS[self.gui.current_lang]['no_object']}: {scan_folder}/{img_name}")
-                    self.bad_cases.append(key_str)
-                    self.validations.append({"scan": scan_folder, "image": img_name, "valid": False})
-                    continue
-                    
-                # Extraire les bounding boxes
-                boxes = []
-                for contour in filtered_contours:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    boxes.append({"x": int(x), "y": int(y), "width": int(w), "height": int(h)})
-                    
-                # Filtrer les boxes
-                self.current_boxes = filter_contained_boxes(boxes)
+            # Masque identique à l'image précédente : reprendre sa décision
+            if (DEDUP_CARRY_DECISIONS and self.last_decision is not None and
+                self.last_decision[:2] == (scan_folder, frame["fingerprint"])):
+                self.carry_decision(frame)
+                continue
                 
-                if not self.current_boxes:
-                    print(f"{TEXTS[self.gui.current_lang]['no_object']}: {scan_folder}/{img_name}")
-                    self.bad_cases.append(key_str)
-                    self.validations.append({"scan": scan_folder, "image": img_name, "valid": False})
+            # Image sûre : validée sans passer par le relecteur
+            if self.triage is not None:
+                accepted, score = self.triage.accept(frame)
+                if accepted:
+                    self.auto_accept(frame, score)
+                    self.last_decision = None
                     continue
-                    
-                # Réinitialiser le cache
-                self.last_alpha = None
-                self.last_mask_state = None
-                self.last_image_hash = None
-                
-                # Mise à jour de l'interface
-                self.update_interface()
                 
-                # Attendre la validation
-                self.validation_var.set(False)
-                self.root.wait_variable(self.validation_var)
+            self.report_journal_error()
+            self.current_scan = scan_folder
+            self.current_img_name = img_name
+            self.current_frame = frame
+            self.current_image = frame["image"]
+            self.current_mask = frame["mask"]
+            self.current_boxes = frame["boxes"]
+            
+            # Réinitialiser le cache
+            self.last_alpha = None
+            self.last_mask_state = None
+            self.last_display_size = None
+            self.overlay_cache = {round(frame["alpha"], 6): frame["overlay"]}
+            
+            # Mise à jour de l'interface
+            self.update_interface()
+            
+            # Attendre la validation
+            self.validation_var.set(False)
+            self.root.wait_variable(self.validation_var)
+            
+            if not self.is_running:
+                return
                 
-                if not self.is_running:
-                    return
-                    
         # Toutes les images ont été traitées
         messagebox.showinfo("Terminé", "Toutes les images ont été traitées.")
         self.quit_app()
         
+    def carry_decision(self, frame):
+        """Applique à l'image la décision prise sur le masque identique précédent"""
+        _, _, valid, source_key = self.last_decision
+        key_str = f"{frame['scan']}/{frame['image_name']}"
+        if valid:
+            self.bounding_boxes[key_str] = frame["boxes"]
+        else:
+            self.bad_cases.append(key_str)
+        self.manifest.mark(key_str)
+        self.journal.append(frame["scan"], frame["image_name"], valid, frame["boxes"],
+                            carried_from=source_key)
+        
+    def auto_accept(self, frame, score):
+        """Valide une image dont le score de triage atteint le seuil"""
+        key_str = f"{frame['scan']}/{frame['image_name']}"
+        self.bounding_boxes[key_str] = frame["boxes"]
+        self.manifest.mark(key_str)
+        self.journal.append(frame["scan"], frame["image_name"], True, frame["boxes"], triage_score=score)
+        metrics.count('frames_auto_accepted')
+        
+    def report_journal_error(self):
+        """Signale une écriture du journal ou un export en échec (thread d'écriture)"""
+        error = self.journal.take_error()
+        if error is not None:
+            messagebox.showwarning("Journal", f"{TEXTS[self.gui.current_lang]['journal_error']} {error}")
+        
+    def request_render(self):
+        """
+        Planifie un rendu au prochain passage de la boucle Tk. Les demandes
+        rapprochées (touches maintenues) sont regroupées en un seul rendu.
+        """
+        if not self.render_pending:
+            self.render_pending = True
+            self.root.after_idle(self.update_interface)
+        
     def update_interface(self):
         """Met à jour l'interface avec l'image courante"""
-        if not self.current_image is None and not self.current_mask is None:
-            # Vérifier si une mise à jour est nécessaire
-            current_alpha = self.gui.current_alpha if self.gui.mask_enabled else 0
-            current_hash = hash(self.current_image.tobytes())
+        from utils.bbox_utils import render_overlay
+        self.render_pending = False
+        if self.current_image is None or self.current_mask is None:
+            return
             
-            if (current_alpha != self.last_alpha or 
-                self.gui.mask_enabled != self.last_mask_state or
-                current_hash != self.last_image_hash):
-                
-                # Création des visualisations
-                overlay = create_overlay(self.current_image, self.current_mask, 
-                                       color=(0, 0, 255), alpha=current_alpha)
-                overlay = create_overlay(overlay, ~self.current_mask, 
-                                       color=(0, 255, 0), alpha=current_alpha)
-                
-                # Image avec bounding boxes
-                bbox_img = self.current_image.copy()
-                for box in self.current_boxes:
-                    cv2.rectangle(bbox_img,
-                                 (box["x"], box["y"]),
-                                 (box["x"] + box["width"], box["y"] + box["height"]),
-                                 (0, 255, 0), 2)
-                                 
-                # Mise à jour de l'interface
-                self.gui.update_image(overlay, bbox_img)
-                self.gui.update_info(
-                    self.current_scan,
-                    self.current_img_name,
-                    len(self.current_boxes),
-                    image_size=(self.current_image.shape[1], self.current_image.shape[0]),
-                    boxes=self.current_boxes,
-                    mask=self.current_mask
-                )
-                
-                # Mettre à jour le cache
-                self.last_alpha = current_alpha
-                self.last_mask_state = self.gui.mask_enabled
-                self.last_image_hash = current_hash
+        # Vérifier si une mise à jour est nécessaire
+        current_alpha = self.gui.current_alpha if self.gui.mask_enabled else 0
+        display_size = self.gui.display_size()
+        if (current_alpha == self.last_alpha and 
+            self.gui.mask_enabled == self.last_mask_state and
+            display_size == self.last_display_size):
+            return
+            
+        # Rendu en calques, chacun recalculé seulement quand ses entrées changent :
+        # image de base et boxes (par taille d'affichage), masque (par opacité)
+        frame = self.current_frame
+        if frame["display_size"] != display_size:
+            self.prepare_display(display_size)
             
-        # Planifier la prochaine mise à jour
-        self.root.after(self.update_interval, self.update_interface)
+        # Calque du masque (mis en cache par opacité pour l'image courante ;
+        # masque masqué : l'image de base elle-même)
+        if self.gui.mask_enabled:
+            cache_key = round(current_alpha, 6)
+            overlay = self.overlay_cache.get(cache_key)
+            if overlay is None:
+                with metrics.timer('overlay'):
+                    overlay = render_overlay(frame["display_image"], frame["display_mask"], current_alpha)
+                self.overlay_cache[cache_key] = overlay
+        else:
+            overlay = frame["display_image"]
+        self.prefetcher.alpha = current_alpha
+        self.prefetcher.display_size = display_size
+        
+        # Mise à jour de l'interface (seuls les calques modifiés sont reconvertis)
+        self.gui.update_image(overlay, frame["bbox_img"])
+        if self.last_display_size is None:
+            # Nouvelle image
+            self.gui.update_info(
+                self.current_scan,
+                self.current_img_name,
+                len(self.current_boxes),
+                image_size=(self.current_image.shape[1], self.current_image.shape[0]),
+                boxes=self.current_boxes,
+                mask=self.current_mask
+            )
+        else:
+            self.gui.update_mask_info()
+        
+        # Mettre à jour le cache
+        self.last_alpha = current_alpha
+        self.last_mask_state = self.gui.mask_enabled
+        self.last_display_size = display_size
+        
+    def prepare_display(self, display_size):
+        """Réduit l'image courante, son masque et ses boxes à la taille d'affichage"""
+        from utils.bbox_utils import draw_boxes, resize_for_display
+        frame = self.current_frame
+        with metrics.timer('display_resize'):
+            display_image, display_mask, display_boxes = resize_for_display(
+                self.current_image, self.current_mask, self.current_boxes, display_size)
+        frame["display_size"] = display_size
+        frame["display_image"] = display_image
+        frame["display_mask"] = display_mask
+        with metrics.timer('overlay'):
+            frame["bbox_img"] = draw_boxes(display_image, display_boxes)
+        self.overlay_cache = {}
         
     def validate_box(self):
         """Valide la bounding box courante"""
+        if self.current_frame is None:
+            return
         key_str = f"{self.current_scan}/{self.current_img_name}"
         self.bounding_boxes[key_str] = self.current_boxes
-        self.validations.append({"scan": self.current_scan, 
-                               "image": self.current_img_name, 
-                               "valid": True})
-        self.save_results()
+        self.manifest.mark(key_str)
+        with metrics.timer('journal_append'):
+            self.journal.append(self.current_scan, self.current_img_name, True, self.current_boxes)
+        metrics.count('frames_validated')
+        self.last_decision = (self.current_scan, self.current_frame["fingerprint"], True, key_str)
         self.validation_var.set(True)
         
     def reject_box(self):
         """Rejette la bounding box courante"""
+        if self.current_frame is None:
+            return
         key_str = f"{self.current_scan}/{self.current_img_name}"
         self.bad_cases.append(key_str)
-        self.validations.append({"scan": self.current_scan, 
-                               "image": self.current_img_name, 
-                               "valid": False})
-        self.save_results()
+        self.manifest.mark(key_str)
+        with metrics.timer('journal_append'):
+            self.journal.append(self.current_scan, self.current_img_name, False)
+        metrics.count('frames_rejected')
+        self.last_decision = (self.current_scan, self.current_frame["fingerprint"], False, key_str)
         self.validation_var.set(True)
         
     def save_results(self):
-        """Sauvegarde les résultats"""
-        with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
-            json.dump(self.bounding_boxes, f, indent=2, ensure_ascii=False)
-        with open("validations.json", 'w', encoding='utf-8') as f:
-            json.dump(self.validations, f, indent=2, ensure_ascii=False)
-            
-        # Création du DataFrame
-        df_rows = []
-        for img_path, boxes in self.bounding_boxes.items():
-            scan_folder, img_name = img_path.split('/')
-            for box in boxes:
-                df_rows.append({
-                    'scan_folder': scan_folder,
-                    'image_name': img_name,
-                    'x': box['x'],
-                    'y': box['y'],
-                    'width': box['width'],
-                    'height': box['height']
-                })
-                
-        df = pd.DataFrame(df_rows)
-        df.to_csv(OUTPUT_CSV, index=False)
+        """Demande l'export des résultats en JSON/CSV (fait en arrière-plan)"""
+        if self.journal is None:
+            # Journal pas encore chargé : rien à exporter
+            return
+        self.journal.save()
         
     def quit_app(self):
         """Quitte l'application"""
         self.is_running = False
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+        if self.box_cache is not None:
+            self.box_cache.close()
+        if self.journal is not None:
+            # Écrit les dernières décisions et exporte les résultats
+            try:
+                self.journal.close()
+            except OSError as e:
+                messagebox.showerror("Journal", f"{TEXTS[self.gui.current_lang]['journal_error']} {e}")
         self.validation_var.set(True)
         self.root.quit()
         self.root.destroy()
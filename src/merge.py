@@ -0,0 +1,44 @@
+import argparse
+
+from config import *
+from utils.texts import TEXTS
+from utils.journal import export_results
+from utils.merge import CONFLICT_POLICIES, merge_shards
+
+def parse_args():
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(
+        description="Fusion des résultats de plusieurs partitions (--shard i/N)"
+    )
+    parser.add_argument('shards', nargs='+',
+                        help="Journaux .jsonl ou bounding_boxes .json des partitions")
+    parser.add_argument('--output', default='validations_merged.jsonl', help="Journal fusionné")
+    parser.add_argument('--conflicts', default='merge_conflicts.jsonl',
+                        help="Rapport des images décidées différemment selon les partitions")
+    parser.add_argument('--on-conflict', choices=CONFLICT_POLICIES, default='reject',
+                        help="reject : image à revoir ; first/last : décision de la première/dernière partition")
+    parser.add_argument('--export', action='store_true',
+                        help="Produit aussi les fichiers JSON/CSV habituels à partir du journal fusionné")
+    return parser.parse_args()
+
+def main():
+    """Fusionne les partitions"""
+    args = parse_args()
+    lang = DEFAULT_LANGUAGE
+    partial = [path for path in args.shards if path.endswith('.json')]
+    if partial:
+        print(f"Attention : les partitions .json ({', '.join(partial)}) ne contiennent que les images "
+              f"validées ; leurs images rejetées ne sont pas fusionnées (voir batch.py --journal).")
+    written, conflicts = merge_shards(args.shards, args.output, args.conflicts, args.on_conflict)
+    print(f"{written} images -> '{args.output}'")
+    if conflicts:
+        print(f"{conflicts} conflits ({args.on_conflict}), voir '{args.conflicts}'.")
+
+    if args.export:
+        bounding_boxes, bad_cases, _ = export_results(args.output, OUTPUT_JSON, OUTPUT_CSV, BAD_CASES_FILE,
+                                                      VALIDATIONS_FILE, RESULTS_STORE_DIR)
+        print(f"{TEXTS[lang]['finished']} {len(bounding_boxes)} -> '{OUTPUT_JSON}', '{OUTPUT_CSV}'.")
+        print(f"{len(bad_cases)} {TEXTS[lang]['manual_fix']} '{BAD_CASES_FILE}'.")
+
+if __name__ == "__main__":
+    main()
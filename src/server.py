@@ -0,0 +1,241 @@
+import re
+import json
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import config
+from config import *
+from utils.texts import TEXTS
+from utils.manifest import DatasetManifest, parse_shard
+from utils.journal import ValidationJournal, seed_journal, resume_manifest, export_configured
+from utils.prefetch import FramePrefetcher
+from utils.box_cache import BoxCache
+from utils.dedup import FingerprintMemo
+from utils.work_queue import WorkQueue
+from utils.triage import AutoTriage
+from utils import metrics
+
+# Page de relecture servie sur / (Y : valider, N : rejeter)
+INDEX_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Validation des Bounding Boxes</title>
+<style>
+body { font-family: sans-serif; margin: 10px; }
+img { max-width: 49%; }
+#info { margin: 8px 0; }
+</style>
+</head>
+<body>
+<div>Relecteur : <input id="reviewer" size="12"> <button onclick="save()">Sauvegarder</button>
+<span id="stats"></span></div>
+<div id="info"></div>
+<img id="overlay"> <img id="bbox">
+<div><button onclick="decide('validate')">Valider (Y)</button>
+<button onclick="decide('reject')">Rejeter (N)</button></div>
+<script>
+let token = null;
+let renewTimer = null;
+const reviewer = document.getElementById('reviewer');
+reviewer.value = localStorage.getItem('reviewer') || '';
+reviewer.onchange = () => localStorage.setItem('reviewer', reviewer.value);
+
+async function post(url, body) {
+  const response = await fetch(url, {method: 'POST', body: JSON.stringify(body || {})});
+  return {status: response.status, data: await response.json()};
+}
+
+async function next() {
+  token = null;
+  clearInterval(renewTimer);
+  const {data} = await post('/api/lease', {reviewer: reviewer.value});
+  if (data.done) {
+    document.getElementById('info').textContent = 'Toutes les images ont été traitées.';
+    return;
+  }
+  if (!data.token) {
+    document.getElementById('info').textContent = 'En attente des autres relecteurs...';
+    setTimeout(next, data.retry_after * 1000);
+    return;
+  }
+  token = data.token;
+  document.getElementById('info').textContent =
+    `Scan: ${data.scan}  Image: ${data.image}  Boxes: ${data.boxes.length}`;
+  document.getElementById('overlay').src = data.overlay_url;
+  document.getElementById('bbox').src = data.bbox_url;
+  renewTimer = setInterval(() => post(`/api/leases/${token}/renew`), data.lease_timeout * 1000 / 3);
+  stats();
+}
+
+async function decide(action) {
+  if (!token) return;
+  const {status} = await post(`/api/leases/${token}/${action}`);
+  if (status === 409) alert('Prêt expiré : image confiée à un autre relecteur.');
+  next();
+}
+
+async function save() { await post('/api/save'); stats(); }
+
+async function stats() {
+  const data = await (await fetch('/api/stats')).json();
+  document.getElementById('stats').textContent =
+    `validées: ${data.validated}  rejetées: ${data.rejected}  en cours: ${data.leased}`;
+}
+
+document.addEventListener('keydown', e => {
+  if (e.target === reviewer) return;
+  if (e.key === 'y' || e.key === 'Y') decide('validate');
+  if (e.key === 'n' || e.key === 'N') decide('reject');
+});
+next();
+</script>
+</body>
+</html>
+"""
+
+LEASE_ACTION = re.compile(r'^/api/leases/([0-9a-f]+)/(renew|validate|reject)$')
+FRAME_IMAGE = re.compile(r'^/api/frames/([0-9a-f]+)/(overlay|bbox)\.png$')
+
+# Un seul export à la fois (les requêtes sont traitées par des threads distincts)
+_save_lock = threading.Lock()
+
+def save_results():
+    """Exporte les résultats du journal en JSON/CSV"""
+    with _save_lock:
+        export_configured(config)
+
+class ReviewHandler(BaseHTTPRequestHandler):
+    """Routes HTTP du serveur de relecture (voir README)"""
+    queue = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data, status=200):
+        self.send_body(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+    def read_json(self):
+        """Corps JSON de la requête ({} s'il est vide ou invalide)"""
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            data = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def do_GET(self):
+        if self.path == '/':
+            self.send_body(200, INDEX_PAGE.encode('utf-8'), 'text/html; charset=utf-8')
+            return
+        if self.path == '/api/stats':
+            self.send_json(self.queue.stats())
+            return
+        match = FRAME_IMAGE.match(self.path)
+        if match:
+            item = self.queue.get(match.group(1))
+            if item is None:
+                self.send_json({"error": "lease expired"}, 404)
+                return
+            key = "overlay" if match.group(2) == "overlay" else "bbox_img"
+            self.send_body(200, item[key], 'image/png')
+            return
+        self.send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        body = self.read_json()
+        if self.path == '/api/lease':
+            token, item = self.queue.lease(body.get("reviewer"))
+            if token is None:
+                self.send_json({"done": self.queue.done(), "retry_after": 5})
+                return
+            self.send_json({
+                "done": False,
+                "token": token,
+                "scan": item["scan"],
+                "image": item["image"],
+                "boxes": item["boxes"],
+                "image_size": item["image_size"],
+                "overlay_url": f"/api/frames/{token}/overlay.png",
+                "bbox_url": f"/api/frames/{token}/bbox.png",
+                "lease_timeout": self.queue.lease_timeout
+            })
+            return
+        if self.path == '/api/save':
+            save_results()
+            self.send_json({"ok": True})
+            return
+        match = LEASE_ACTION.match(self.path)
+        if match:
+            token, action = match.groups()
+            if action == 'renew':
+                ok = self.queue.renew(token)
+            else:
+                ok = self.queue.complete(token, action == 'validate')
+            self.send_json({"ok": ok}, 200 if ok else 409)
+            return
+        self.send_json({"error": "not found"}, 404)
+
+def parse_args():
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Serveur de validation partagé entre plusieurs relecteurs")
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--lease-timeout', type=int, default=LEASE_TIMEOUT,
+                        help="Durée d'un prêt d'image, en secondes")
+    return parser.parse_args()
+
+def main():
+    """Lance le serveur de relecture"""
+    args = parse_args()
+    lang = DEFAULT_LANGUAGE
+    metrics.enable(METRICS)
+
+    seed_journal(JOURNAL_FILE, VALIDATIONS_FILE, OUTPUT_JSON)
+    manifest = DatasetManifest(IMAGE_BASE_DIR, MASK_BASE_DIR, MANIFEST_FILE, parse_shard(SHARD))
+    if RESUME:
+        resume_manifest(JOURNAL_FILE, manifest)
+
+    journal = ValidationJournal(JOURNAL_FILE)
+    box_cache = BoxCache(BOX_CACHE_FILE) if BOX_CACHE_FILE else None
+    triage = AutoTriage(AUTO_ACCEPT_THRESHOLD) if AUTO_ACCEPT_THRESHOLD > 0 else None
+    prefetcher = FramePrefetcher(
+        manifest.iter_pending(EXTRACTION_PARAMS),
+        depth=PREFETCH_DEPTH,
+        workers=PREFETCH_WORKERS,
+        alpha=DEFAULT_ALPHA,
+        cache=box_cache,
+        memo=FingerprintMemo() if DEDUP else None,
+        signals=triage is not None
+    )
+    ReviewHandler.queue = WorkQueue(prefetcher, journal, manifest, args.lease_timeout, triage)
+
+    server = ThreadingHTTPServer((args.host, args.port), ReviewHandler)
+    print(f"http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        prefetcher.close()
+        if box_cache is not None:
+            box_cache.close()
+        journal.close()
+        save_results()
+
+    stats = ReviewHandler.queue.stats()
+    print(f"\n{TEXTS[lang]['finished']} {stats['validated']} validées, {stats['auto_accepted']} validées "
+          f"automatiquement, {stats['rejected']} rejetées, {stats['errors']} illisibles.")
+
+if __name__ == "__main__":
+    main()
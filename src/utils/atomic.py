@@ -0,0 +1,32 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Droits des fichiers créés par open() (umask lu une seule fois : os.umask
+# modifie temporairement le masque de tout le processus)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+@contextmanager
+def atomic_open(path, mode='w', **kwargs):
+    """
+    Ouvre un fichier temporaire qui remplace path (os.replace) à la fermeture :
+    un lecteur voit toujours l'ancienne ou la nouvelle version complète, même
+    après un arrêt brutal pendant l'écriture.
+
+    Chaque appel écrit dans son propre fichier temporaire (tempfile.mkstemp,
+    dans le dossier de path) : deux écritures simultanées du même fichier ne
+    se mélangent pas, la dernière terminée l'emporte.
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory or '.')
+    try:
+        # mkstemp crée le fichier en 0600 : mêmes droits qu'un open() classique
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        with open(fd, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,328 @@
+import os
+import json
+import cv2
+import numpy as np
+from collections import namedtuple, deque
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from utils.bbox_utils import extract_boxes, scale_boxes
+from utils.frame_source import read_frame, frame_size
+from utils.manifest import DatasetManifest
+from utils.box_cache import BoxCache
+from utils.box_store import BoxStore
+from utils.atomic import atomic_open
+from utils.dedup import FingerprintMemo, mask_fingerprint
+from utils import metrics
+
+# Statuts possibles d'une image traitée (les erreurs reprennent les clés de TEXTS)
+STATUS_OK = 'ok'
+STATUS_READ_ERROR = 'read_error'
+STATUS_NO_OBJECT = 'no_object'
+
+# Décodage du masque à pleine résolution ou réduite (paramètre mask_reduction)
+MASK_REDUCTIONS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8
+}
+
+# Résultat d'une image : clé "scan/image", boxes, statut, et statistiques
+# (durée du traitement en ms, résultat lu dans le cache, nombre de boxes)
+BoxResult = namedtuple('BoxResult', ['key', 'boxes', 'status', 'stats'])
+
+# Cache des boxes et mémoire des masques de chaque processus worker (voir _init_worker)
+_worker_cache = None
+_worker_memo = None
+
+def iter_tasks(image_base_dir, mask_base_dir, params=None, manifest_file=None, shard=None):
+    """
+    Parcourt le dataset et génère les tâches d'extraction, dans le même ordre
+    que l'interface de validation.
+
+    Args:
+        shard: Partition (i, N) à traiter (voir manifest.shard_of), tout le
+            dataset par défaut
+    Returns:
+        Générateur de tuples (scan_folder, img_name, img_path, mask_path, params)
+    """
+    manifest = DatasetManifest(image_base_dir, mask_base_dir, manifest_file, shard)
+    return manifest.iter_pending(params)
+
+def _init_worker(cache_file, dedup=True, metrics_enabled=False):
+    """
+    Ouvre le cache des boxes et la mémoire des masques d'un processus worker,
+    et y active les mesures si elles le sont dans le processus principal.
+    """
+    global _worker_cache, _worker_memo
+    metrics.enable(metrics_enabled)
+    if cache_file:
+        _worker_cache = BoxCache(cache_file)
+    if dedup:
+        _worker_memo = FingerprintMemo()
+
+def _process_cached(task, cache=None, memo=None):
+    """
+    Extrait les bounding boxes d'une image (dans un processus worker, ou dans
+    le processus courant avec workers=0), sans lire les fichiers si le cache
+    est à jour. Seul le masque est décodé (voir load_and_extract, mask_only).
+
+    Args:
+        task: Tâche d'extraction (voir iter_tasks)
+        cache: BoxCache consulté avant la lecture (celui du worker par défaut)
+        memo: FingerprintMemo des masques déjà vus (celle du worker par défaut)
+    Returns:
+        Tuple (clé, statut, boxes, entrée à mettre en cache ou None, durée en secondes)
+    """
+    start = perf_counter()
+    cache = _worker_cache if cache is None else cache
+    memo = _worker_memo if memo is None else memo
+    scan_folder, img_name, img_path, mask_path, params = task
+    key_str = f"{scan_folder}/{img_name}"
+    signature = None
+    if cache is not None:
+        signature = BoxCache.signature(img_path, mask_path, params)
+        cached = cache.get(mask_path, signature)
+        if cached is not None:
+            return key_str, cached[0], cached[1], None, perf_counter() - start
+
+    status, _, _, boxes, _ = load_and_extract(task, memo=memo, decode_mask=False, mask_only=True)
+    return key_str, status, boxes, (mask_path, signature), perf_counter() - start
+
+def _process_chunk(tasks):
+    """
+    Traite un lot de tâches dans un processus worker.
+
+    Returns:
+        Tuple (résultats de _process_cached, mesures du lot à fusionner dans
+        le processus principal, voir metrics.drain)
+    """
+    results = [_process_cached(task) for task in tasks]
+    return results, metrics.drain()
+
+def _chunks(tasks, chunksize):
+    """Découpe un itérable de tâches en listes de chunksize tâches"""
+    chunk = []
+    for task in tasks:
+        chunk.append(task)
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def read_file(path):
+    """Lit le contenu d'un fichier, ou None s'il est illisible ou vide"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read() or None
+    except OSError:
+        return None
+
+def _extract_reduced(mask, params, reduction, image_size):
+    """
+    Extrait les boxes d'un masque décodé à 1/reduction de la résolution de
+    l'image : l'aire minimale est réduite d'autant, puis les boxes sont
+    remises à l'échelle de l'image.
+    """
+    height, width = image_size
+    params = dict(params)
+    params['min_area'] = params.get('min_area', 100) / (reduction * reduction)
+    boxes = extract_boxes(mask, **params)
+    boxes = scale_boxes(boxes, width / mask.shape[1], height / mask.shape[0])
+    for box in boxes:
+        box['width'] = min(box['width'], width - box['x'])
+        box['height'] = min(box['height'], height - box['y'])
+    return boxes
+
+def load_and_extract(task, cache=None, memo=None, decode_mask=True, mask_only=False):
+    """
+    Lit une image et son masque, redimensionne le masque et extrait les boxes.
+
+    Args:
+        task: Tuple (scan_folder, img_name, img_path, mask_path, params), où
+            params sont les paramètres passés à extract_boxes
+            (min_area, threshold, backend), plus mask_reduction (1, 2, 4
+            ou 8) pour décoder le masque à résolution réduite
+        cache: BoxCache optionnel, consulté avant l'extraction
+        memo: FingerprintMemo optionnel ; un masque identique à un masque déjà
+            vu dans le même scan réutilise ses boxes
+        decode_mask: Si False, le masque n'est pas décodé quand ses boxes
+            sont déjà connues (le masque retourné vaut alors None)
+        mask_only: Si True, l'image n'est pas décodée : sa taille est lue
+            dans l'en-tête du fichier ou de la vidéo (l'image retournée vaut
+            alors None)
+
+    Returns:
+        Tuple (statut, image, masque redimensionné, liste des boxes, empreinte du masque)
+    """
+    scan_folder, img_name, img_path, mask_path, params = task
+    extract_params = dict(params or {})
+    reduction = extract_params.pop('mask_reduction', 1)
+
+    with metrics.timer('imread'):
+        image = None
+        image_size = frame_size(img_path) if mask_only else None
+        if image_size is None:
+            # Format non reconnu (ou interface) : décodage complet
+            image = read_frame(img_path)
+            if image is not None:
+                image_size = image.shape[:2]
+        mask_bytes = read_file(mask_path)
+    if image_size is None or mask_bytes is None:
+        return STATUS_READ_ERROR, image, None, [], None
+    if mask_only:
+        image = None
+
+    fingerprint = mask_fingerprint(mask_bytes, image_size)
+    known = memo.get(scan_folder, fingerprint) if memo is not None else None
+
+    mask = None
+    if known is None or decode_mask:
+        with metrics.timer('mask_decode'):
+            mask = cv2.imdecode(np.frombuffer(mask_bytes, np.uint8), MASK_REDUCTIONS[reduction])
+        if mask is None:
+            return STATUS_READ_ERROR, image, None, [], None
+
+        # Redimensionner le masque (à 1/reduction de la taille de l'image)
+        height, width = image_size
+        size = (-(-width // reduction), -(-height // reduction))
+        with metrics.timer('mask_resize'):
+            mask = cv2.resize(mask, size, interpolation=cv2.INTER_NEAREST)
+
+    if known is not None:
+        metrics.count('dedup_hits')
+        return known[0], image, mask, known[1], fingerprint
+
+    if cache is not None:
+        signature = BoxCache.signature(img_path, mask_path, params)
+        known = cache.get(mask_path, signature)
+    if known is not None:
+        metrics.count('box_cache_hits')
+        status, boxes = known
+    else:
+        if reduction > 1:
+            boxes = _extract_reduced(mask, extract_params, reduction, image_size)
+        else:
+            boxes = extract_boxes(mask, **extract_params)
+        status = STATUS_OK if boxes else STATUS_NO_OBJECT
+        if cache is not None:
+            cache.put(mask_path, signature, status, boxes)
+
+    if memo is not None:
+        memo.put(scan_folder, fingerprint, status, boxes)
+    return status, image, mask, boxes, fingerprint
+
+def iter_boxes(image_dir, mask_dir, params=None, workers=None, chunksize=16, max_pending=None,
+               manifest_file=None, cache_file=None, dedup=True, shard=None):
+    """
+    Extrait les bounding boxes du dataset et génère les résultats au fur et à
+    mesure, sans interface ni accumulation en mémoire.
+
+    Les tâches sont envoyées aux workers par lots de chunksize images, avec au
+    plus max_pending lots en cours : tant que le consommateur ne lit pas les
+    résultats, aucun nouveau lot n'est lancé. Arrêter l'itération (break,
+    close()) annule les lots en attente et libère les processus.
+
+        for result in iter_boxes("rawframes", "masks", {"min_area": 100}):
+            if result.status == STATUS_OK:
+                writer.write(result.key, result.boxes)
+
+    Args:
+        image_dir: Dossier des images (un sous-dossier par scan)
+        mask_dir: Dossier des masques (même arborescence)
+        params: Paramètres d'extraction passés à extract_boxes
+        workers: Nombre de processus (par défaut, un par cœur) ; 0 traite
+            les images dans le processus courant
+        chunksize: Nombre d'images envoyées à un worker à la fois
+        max_pending: Nombre maximal de lots en cours (par défaut, deux par worker)
+        manifest_file: Cache de l'index du dataset (optionnel)
+        cache_file: Cache des boxes déjà extraites (optionnel) ; seuls les
+            masques modifiés sont recalculés
+        dedup: Réutilise les boxes des masques identiques d'un même scan
+        shard: Partition (i, N) à traiter, tout le dataset par défaut
+    Returns:
+        Générateur de BoxResult, dans l'ordre du dataset
+    """
+    if not os.path.exists(image_dir):
+        raise FileNotFoundError(f"Le dossier {image_dir} n'existe pas")
+    if not os.path.exists(mask_dir):
+        raise FileNotFoundError(f"Le dossier {mask_dir} n'existe pas")
+
+    workers = os.cpu_count() if workers is None else workers
+    chunks = _chunks(iter_tasks(image_dir, mask_dir, params, manifest_file, shard), chunksize)
+    cache = BoxCache(cache_file) if cache_file else None
+    executor = None
+    try:
+        if workers > 0:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(cache_file, dedup, metrics.is_enabled()))
+            results = _iter_parallel(executor, chunks, max_pending or 2 * workers)
+        else:
+            memo = FingerprintMemo() if dedup else None
+            results = (_process_cached(task, cache, memo) for chunk in chunks for task in chunk)
+
+        for key_str, status, boxes, entry, elapsed in results:
+            metrics.count('frames_' + status)
+            if entry is None:
+                metrics.count('box_cache_hits')
+            # Les écritures dans le cache sont faites par le processus principal
+            if cache is not None and entry is not None and status != STATUS_READ_ERROR:
+                cache.put(entry[0], entry[1], status, boxes)
+            yield BoxResult(key_str, boxes, status,
+                            {"elapsed_ms": elapsed * 1000, "cached": entry is None, "count": len(boxes)})
+
+        # Éviction des entrées dont le masque a disparu (seulement après un parcours complet)
+        if cache is not None:
+            cache.prune()
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if cache is not None:
+            cache.close()
+
+def _iter_parallel(executor, chunks, max_pending):
+    """
+    Soumet les lots aux workers avec au plus max_pending lots en cours, et
+    génère leurs résultats dans l'ordre de soumission. Les mesures de chaque
+    lot sont ajoutées à celles du processus principal.
+    """
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(_process_chunk, chunk))
+        if len(pending) >= max_pending:
+            yield from _chunk_results(pending.popleft())
+    while pending:
+        yield from _chunk_results(pending.popleft())
+
+def _chunk_results(future):
+    """Résultats d'un lot terminé, après fusion de ses mesures"""
+    results, delta = future.result()
+    metrics.merge(delta)
+    return results
+
+def write_results(bounding_boxes, bad_cases, output_json, output_csv, bad_cases_file,
+                  store=None, store_dir=None):
+    """
+    Écrit les résultats aux mêmes formats que l'interface de validation
+    (chaque fichier est remplacé d'un bloc, voir atomic_open).
+
+    Args:
+        store: BoxStore déjà rempli (construit à partir de bounding_boxes sinon)
+        store_dir: Dossier du stockage en colonnes .npy (optionnel)
+    Returns:
+        Le BoxStore utilisé pour l'écriture
+    """
+    with atomic_open(output_json, 'w', encoding='utf-8') as f:
+        json.dump(bounding_boxes, f, indent=2, ensure_ascii=False)
+    with atomic_open(bad_cases_file, 'w', encoding='utf-8') as f:
+        for case in bad_cases:
+            f.write(case + "\n")
+
+    if store is None:
+        store = BoxStore.from_dict(bounding_boxes)
+    store.write_csv(output_csv)
+    if store_dir:
+        store.save(store_dir)
+    return store
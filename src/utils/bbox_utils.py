@@ -1,6 +1,20 @@
 import cv2
 import numpy as np
 
+from utils import metrics
+
+# Nombre de boxes à partir duquel le filtrage vectorisé est utilisé
+VECTORIZED_FILTER_MIN_BOXES = 32
+
+# Version des règles d'extraction et de filtrage (à incrémenter quand elles
+# changent, pour invalider le cache des boxes)
+EXTRACTION_VERSION = 1
+
+# Méthodes d'extraction des boxes
+BACKEND_CONTOURS = 'contours'
+BACKEND_COMPONENTS = 'components'
+EXTRACTION_BACKENDS = (BACKEND_CONTOURS, BACKEND_COMPONENTS)
+
 def create_overlay(image, mask, color=(0, 255, 0), alpha=0.3):
     """
     Crée une superposition du masque sur l'image avec transparence.
@@ -18,6 +32,111 @@ def create_overlay(image, mask, color=(0, 255, 0), alpha=0.3):
     overlay[mask_bool] = overlay[mask_bool] * (1 - alpha) + np.array(color) * alpha
     return overlay
 
+# Tables de correspondance par opacité : (rouge, vert, rouge puis vert)
+_BLEND_LUTS = {}
+
+def get_blend_luts(alpha):
+    """
+    Tables de correspondance uint8 (256x1x3) du mélange avec le rouge, le vert
+    et le rouge puis le vert, pour une opacité donnée.
+    
+    Les valeurs sont identiques à celles de create_overlay (calcul en flottant
+    puis troncature en uint8), mais calculées une seule fois par opacité.
+    """
+    key = round(alpha, 6)
+    luts = _BLEND_LUTS.get(key)
+    if luts is None:
+        values = np.arange(256, dtype=np.float64)
+        red = np.empty((256, 1, 3), dtype=np.uint8)
+        green = np.empty((256, 1, 3), dtype=np.uint8)
+        for channel in range(3):
+            red[:, 0, channel] = values * (1 - alpha) + (0, 0, 255)[channel] * alpha
+            green[:, 0, channel] = values * (1 - alpha) + (0, 255, 0)[channel] * alpha
+        both = np.empty_like(red)
+        for channel in range(3):
+            both[:, 0, channel] = green[red[:, 0, channel], 0, channel]
+        luts = (red, green, both)
+        _BLEND_LUTS[key] = luts
+    return luts
+
+def render_overlay(image, mask, alpha=0.3, dst=None):
+    """
+    Superpose le masque (rouge) et le fond (vert) sur l'image en une passe.
+    
+    Équivalent à deux appels de create_overlay (masque en rouge, puis ~masque
+    en vert), sans copie intermédiaire ni passage en flottant : chaque classe
+    de pixels est traitée par une table de correspondance.
+    
+    Args:
+        image: Image originale (BGR, uint8)
+        mask: Masque en niveaux de gris (uint8)
+        alpha: Transparence (0-1)
+        dst: Tableau de sortie préalloué (optionnel)
+    """
+    if alpha == 0:
+        if dst is None:
+            return image.copy()
+        np.copyto(dst, image)
+        return dst
+        
+    red, green, both = get_blend_luts(alpha)
+    # Fond (masque nul) en vert, masque plein en rouge, valeurs intermédiaires
+    # (masques JPEG) en rouge puis vert comme avec create_overlay
+    overlay = cv2.LUT(image, green, dst=dst)
+    cv2.copyTo(cv2.LUT(image, red), (mask == 255).view(np.uint8), overlay)
+    partial = cv2.inRange(mask, 1, 254)
+    if cv2.countNonZero(partial):
+        cv2.copyTo(cv2.LUT(image, both), partial, overlay)
+    return overlay
+
+def draw_boxes(image, boxes, color=(0, 255, 0), thickness=2):
+    """
+    Dessine les bounding boxes sur une copie de l'image.
+    """
+    bbox_img = image.copy()
+    for box in boxes:
+        cv2.rectangle(bbox_img,
+                     (box["x"], box["y"]),
+                     (box["x"] + box["width"], box["y"] + box["height"]),
+                     color, thickness)
+    return bbox_img
+
+def fit_size(image_size, max_size):
+    """
+    Plus grande taille (largeur, hauteur) qui tient dans max_size en
+    conservant les proportions de l'image.
+    """
+    width, height = image_size
+    scale = min(max_size[0] / width, max_size[1] / height)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+def scale_boxes(boxes, scale_x, scale_y):
+    """
+    Met les coordonnées des bounding boxes à l'échelle.
+    """
+    return [{"x": int(round(box["x"] * scale_x)),
+             "y": int(round(box["y"] * scale_y)),
+             "width": int(round(box["width"] * scale_x)),
+             "height": int(round(box["height"] * scale_y))}
+            for box in boxes]
+
+def resize_for_display(image, mask, boxes, max_size):
+    """
+    Réduit une seule fois l'image et le masque à la taille d'affichage
+    (INTER_AREA) et met les boxes à la même échelle : la superposition et le
+    tracé des boxes se font ensuite à la résolution de l'écran.
+    
+    Returns:
+        Tuple (image, masque, boxes) à la taille d'affichage
+    """
+    height, width = image.shape[:2]
+    size = fit_size((width, height), max_size)
+    interpolation = cv2.INTER_AREA if size[0] < width else cv2.INTER_LINEAR
+    display_image = cv2.resize(image, size, interpolation=interpolation)
+    display_mask = cv2.resize(mask, size, interpolation=interpolation)
+    display_boxes = scale_boxes(boxes, size[0] / width, size[1] / height)
+    return display_image, display_mask, display_boxes
+
 def filter_contours(contours, min_area=100):
     """
     Filtre les contours selon leur aire.
@@ -95,9 +214,14 @@ def filter_contained_boxes(boxes):
     Filtre les bounding boxes selon les critères :
     - Complètement contenues dans une autre
     - Partiellement contenues et aire < 10% de la plus grande
+    
+    Au-delà de VECTORIZED_FILTER_MIN_BOXES boxes, le calcul est délégué à
+    filter_contained_boxes_vectorized (mêmes résultats).
     """
     if not boxes:
         return boxes
+    if len(boxes) >= VECTORIZED_FILTER_MIN_BOXES:
+        return filter_contained_boxes_vectorized(boxes)
         
     filtered_boxes = []
     n = len(boxes)
@@ -114,4 +238,110 @@ def filter_contained_boxes(boxes):
         if not should_remove:
             filtered_boxes.append(box_i)
             
-    return filtered_boxes 
\ No newline at end of file
+    return filtered_boxes 
+
+def filter_contained_boxes_vectorized(boxes, chunk_size=1024):
+    """
+    Version NumPy de filter_contained_boxes pour les masques bruités
+    (centaines de composantes).
+    
+    Les critères de should_remove_box sont évalués par diffusion sur un
+    tableau (n, 4), par blocs de chunk_size lignes pour borner la mémoire.
+    Le seuil de 10% est comparé en flottant comme dans should_remove_box,
+    les résultats sont donc identiques.
+    """
+    coords = np.array([[box['x'], box['y'], box['width'], box['height']] for box in boxes],
+                      dtype=np.int64)
+    x1, y1 = coords[:, 0], coords[:, 1]
+    x2, y2 = x1 + coords[:, 2], y1 + coords[:, 3]
+    areas = coords[:, 2] * coords[:, 3]
+    tenth_areas = 0.1 * areas
+    
+    n = len(boxes)
+    keep = np.ones(n, dtype=bool)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        bx1, by1 = x1[start:stop, None], y1[start:stop, None]
+        bx2, by2 = x2[start:stop, None], y2[start:stop, None]
+        barea = areas[start:stop, None]
+        
+        # Critère 1 : box i complètement contenue dans box j
+        contained = (bx1 >= x1) & (by1 >= y1) & (bx2 <= x2) & (by2 <= y2)
+        
+        # Critère 2 : intersection non vide et aire de box i < 10% de celle de box j
+        intersects = ((np.minimum(bx2, x2) > np.maximum(bx1, x1)) &
+                      (np.minimum(by2, y2) > np.maximum(by1, y1)))
+        small = (barea < areas) & (barea < tenth_areas)
+        
+        remove = contained | (intersects & small)
+        rows = np.arange(stop - start)
+        remove[rows, rows + start] = False
+        keep[start:stop] = ~remove.any(axis=1)
+        
+    return [boxes[i] for i in np.flatnonzero(keep)]
+
+def extract_component_boxes(mask_bin, min_area=100):
+    """
+    Extrait les bounding boxes des composantes connexes d'un masque binaire,
+    en un seul appel à cv2.connectedComponentsWithStats.
+    
+    Différences avec l'extraction par contours :
+    - l'aire comparée à min_area est le nombre de pixels de la composante,
+      alors que cv2.contourArea mesure l'aire du polygone du contour externe
+      (trous inclus, et environ un demi-périmètre de moins que le nombre de
+      pixels pour une forme pleine) ;
+    - les composantes situées dans le trou d'une autre sont aussi retournées
+      (RETR_EXTERNAL les ignore), mais leur box est contenue dans celle de la
+      composante englobante et disparaît donc au filtrage ;
+    - les boxes sont dans l'ordre des étiquettes (premier pixel rencontré en
+      balayant le masque de haut en bas), en général l'ordre inverse de
+      cv2.findContours. Pour un même masque, l'ordre des boxes dans les
+      fichiers JSON/CSV diffère donc d'une méthode à l'autre, et merge.py
+      signale un conflit entre deux partitions extraites par des méthodes
+      différentes (les listes de boxes y sont comparées telles quelles).
+    
+    Args:
+        mask_bin: Masque binaire (uint8)
+        min_area: Nombre de pixels minimal pour conserver une composante
+    Returns:
+        Tableau (n, 5) int32 : x, y, largeur, hauteur, aire en pixels
+    """
+    _, _, stats, _ = cv2.connectedComponentsWithStats(mask_bin, connectivity=8)
+    stats = stats[1:]  # l'étiquette 0 est le fond
+    return stats[stats[:, cv2.CC_STAT_AREA] > min_area]
+
+def extract_boxes(mask, min_area=100, threshold=127, backend=BACKEND_CONTOURS):
+    """
+    Extrait les bounding boxes d'un masque en niveaux de gris.
+    
+    Args:
+        mask: Masque (déjà redimensionné à la taille de l'image)
+        min_area: Aire minimale pour conserver un objet
+        threshold: Seuil de binarisation du masque
+        backend: BACKEND_CONTOURS (findContours, aire du contour) ou
+            BACKEND_COMPONENTS (composantes connexes, aire en pixels)
+    Returns:
+        Liste des bounding boxes filtrées (dictionnaires x, y, width, height)
+    """
+    with metrics.timer('threshold'):
+        _, mask_bin = cv2.threshold(mask, threshold, 255, cv2.THRESH_BINARY)
+    
+    if backend == BACKEND_COMPONENTS:
+        with metrics.timer('connected_components'):
+            stats = extract_component_boxes(mask_bin, min_area)
+        boxes = [{"x": int(x), "y": int(y), "width": int(w), "height": int(h)}
+                 for x, y, w, h, _ in stats.tolist()]
+    elif backend == BACKEND_CONTOURS:
+        with metrics.timer('find_contours'):
+            contours, _ = cv2.findContours(mask_bin, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            filtered_contours = filter_contours(contours, min_area)
+        
+        boxes = []
+        for contour in filtered_contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            boxes.append({"x": int(x), "y": int(y), "width": int(w), "height": int(h)})
+    else:
+        raise ValueError(f"Méthode d'extraction inconnue : {backend}")
+        
+    with metrics.timer('filter_contained_boxes'):
+        return filter_contained_boxes(boxes)
@@ -0,0 +1,102 @@
+import os
+import json
+import sqlite3
+import threading
+
+from utils.bbox_utils import EXTRACTION_VERSION
+from utils.frame_source import source_file
+
+class BoxCache:
+    """
+    Cache sur disque (SQLite) des boxes extraites de chaque masque.
+
+    Une entrée est associée au chemin absolu du masque (la même quel que soit
+    le dossier courant ou la forme de --masks) et valable tant que la
+    signature ne change pas : mtime/taille du masque et de l'image (le masque
+    est redimensionné à la taille de l'image), paramètres d'extraction et
+    version des règles de filtrage.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS boxes ("
+            "mask_path TEXT PRIMARY KEY, signature TEXT, status TEXT, boxes TEXT)"
+        )
+        self.conn.commit()
+        self.pending_writes = 0
+
+    @staticmethod
+    def key(mask_path):
+        """Clé d'un masque dans la base : son chemin absolu"""
+        return os.path.abspath(mask_path)
+
+    @staticmethod
+    def signature(img_path, mask_path, params=None):
+        """
+        Signature d'une extraction, ou None si un des fichiers est absent.
+        """
+        try:
+            img_stat = os.stat(source_file(img_path))
+            mask_stat = os.stat(mask_path)
+        except OSError:
+            return None
+        return "|".join([
+            f"{mask_stat.st_mtime_ns}:{mask_stat.st_size}",
+            f"{img_stat.st_mtime_ns}:{img_stat.st_size}",
+            json.dumps(params or {}, sort_keys=True),
+            str(EXTRACTION_VERSION)
+        ])
+
+    def get(self, mask_path, signature):
+        """
+        Returns:
+            Tuple (statut, boxes) si l'entrée est à jour, None sinon
+        """
+        if signature is None:
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT signature, status, boxes FROM boxes WHERE mask_path = ?", (self.key(mask_path),)
+            ).fetchone()
+        if row is None or row[0] != signature:
+            return None
+        return row[1], json.loads(row[2])
+
+    def put(self, mask_path, signature, status, boxes, commit_every=256):
+        """Enregistre le résultat d'une extraction (écritures groupées)"""
+        if signature is None:
+            return
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO boxes VALUES (?, ?, ?, ?)",
+                (self.key(mask_path), signature, status, json.dumps(boxes))
+            )
+            self.pending_writes += 1
+            if self.pending_writes >= commit_every:
+                self.conn.commit()
+                self.pending_writes = 0
+
+    def prune(self):
+        """
+        Supprime les entrées dont le masque n'existe plus, ainsi que celles
+        des versions précédentes, indexées par un chemin relatif.
+
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        with self.lock:
+            paths = [row[0] for row in self.conn.execute("SELECT mask_path FROM boxes")]
+            stale = [(path,) for path in paths if not os.path.isabs(path) or not os.path.exists(path)]
+            self.conn.executemany("DELETE FROM boxes WHERE mask_path = ?", stale)
+            self.conn.commit()
+            self.pending_writes = 0
+        return len(stale)
+
+    def close(self):
+        """Valide les écritures en attente et ferme la base"""
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,156 @@
+import os
+import csv
+import json
+import numpy as np
+
+from utils.atomic import atomic_open
+
+COLUMNS = ('image_id', 'x', 'y', 'width', 'height')
+
+class BoxStore:
+    """
+    Stockage en colonnes des bounding boxes.
+
+    Une ligne par box : identifiant de l'image et coordonnées, en tableaux
+    int32 qui grandissent par doublement (ajout en O(1) amorti). Les noms de
+    scans et d'images sont stockés une seule fois (colonnes catégorielles) :
+    image_scan[image_id] donne l'identifiant du scan d'une image.
+    """
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.columns = {name: np.empty(capacity, dtype=np.int32) for name in COLUMNS}
+        self.scans = []
+        self.images = []
+        self.image_scan = []
+        self._scan_ids = {}
+        self._image_ids = {}
+
+    def __len__(self):
+        return self.size
+
+    def _reserve(self, count):
+        """Agrandit les colonnes pour pouvoir ajouter count lignes"""
+        capacity = len(self.columns['x'])
+        if self.size + count <= capacity:
+            return
+        while capacity < self.size + count:
+            capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.empty(capacity, dtype=np.int32)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def _image_id(self, scan_folder, img_name):
+        """Identifiant d'une image (créé au premier ajout)"""
+        key_str = f"{scan_folder}/{img_name}"
+        image_id = self._image_ids.get(key_str)
+        if image_id is None:
+            scan_id = self._scan_ids.get(scan_folder)
+            if scan_id is None:
+                scan_id = len(self.scans)
+                self._scan_ids[scan_folder] = scan_id
+                self.scans.append(scan_folder)
+            image_id = len(self.images)
+            self._image_ids[key_str] = image_id
+            self.images.append(img_name)
+            self.image_scan.append(scan_id)
+        return image_id
+
+    def append(self, scan_folder, img_name, boxes):
+        """Ajoute les boxes d'une image"""
+        image_id = self._image_id(scan_folder, img_name)
+        count = len(boxes)
+        if not count:
+            return
+        self._reserve(count)
+        rows = slice(self.size, self.size + count)
+        self.columns['image_id'][rows] = image_id
+        self.columns['x'][rows] = [box['x'] for box in boxes]
+        self.columns['y'][rows] = [box['y'] for box in boxes]
+        self.columns['width'][rows] = [box['width'] for box in boxes]
+        self.columns['height'][rows] = [box['height'] for box in boxes]
+        self.size += count
+
+    @classmethod
+    def from_dict(cls, bounding_boxes):
+        """Construit le stockage à partir d'un dictionnaire {"scan/image": boxes}"""
+        store = cls(capacity=max(1024, 2 * len(bounding_boxes)))
+        for key_str, boxes in bounding_boxes.items():
+            scan_folder, img_name = key_str.split('/', 1)
+            store.append(scan_folder, img_name, boxes)
+        return store
+
+    def arrays(self):
+        """Colonnes réduites au nombre de lignes (vues, sans copie)"""
+        arrays = {name: column[:self.size] for name, column in self.columns.items()}
+        arrays['image_scan'] = np.asarray(self.image_scan, dtype=np.int32)
+        return arrays
+
+    def save(self, directory):
+        """
+        Écrit une colonne .npy par champ, relisible par memory mapping avec
+        BoxStore.load().
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self.arrays().items():
+            with atomic_open(os.path.join(directory, f"{name}.npy"), 'wb') as f:
+                np.save(f, array)
+        with atomic_open(os.path.join(directory, "names.json"), 'w', encoding='utf-8') as f:
+            json.dump({"scans": self.scans, "images": self.images}, f, ensure_ascii=False)
+
+    @staticmethod
+    def load(directory, mmap=True):
+        """
+        Relit un stockage écrit par save().
+
+        Returns:
+            Dictionnaire des colonnes (memory-mappées si mmap), plus les listes
+            'scans' et 'images'
+        """
+        mode = 'r' if mmap else None
+        data = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+                for name in COLUMNS + ('image_scan',)}
+        with open(os.path.join(directory, "names.json"), 'r', encoding='utf-8') as f:
+            data.update(json.load(f))
+        return data
+
+    def export_npz(self, path):
+        """Exporte les colonnes dans une archive .npz"""
+        np.savez(path, scans=np.asarray(self.scans, dtype=str),
+                 images=np.asarray(self.images, dtype=str), **self.arrays())
+
+    def export_parquet(self, path):
+        """
+        Exporte en Parquet, avec scan et image en colonnes dictionnaire
+        (nécessite pyarrow).
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("L'export Parquet nécessite pyarrow (pip install pyarrow)")
+
+        arrays = self.arrays()
+        image_ids = arrays['image_id']
+        scan_ids = arrays['image_scan'][image_ids]
+        table = pa.table({
+            'scan_folder': pa.DictionaryArray.from_arrays(scan_ids, pa.array(self.scans, pa.string())),
+            'image_name': pa.DictionaryArray.from_arrays(image_ids, pa.array(self.images, pa.string())),
+            'x': arrays['x'],
+            'y': arrays['y'],
+            'width': arrays['width'],
+            'height': arrays['height']
+        })
+        pq.write_table(table, path)
+
+    def write_csv(self, path):
+        """Écrit le CSV habituel (une ligne par box)"""
+        arrays = self.arrays()
+        image_scan = self.image_scan
+        with atomic_open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(['scan_folder', 'image_name', 'x', 'y', 'width', 'height'])
+            for image_id, x, y, width, height in zip(arrays['image_id'].tolist(), arrays['x'].tolist(),
+                                                     arrays['y'].tolist(), arrays['width'].tolist(),
+                                                     arrays['height'].tolist()):
+                writer.writerow([self.scans[image_scan[image_id]], self.images[image_id], x, y, width, height])
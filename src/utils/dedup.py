@@ -0,0 +1,45 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+def mask_fingerprint(mask_bytes, image_shape):
+    """
+    Empreinte d'un masque : hachage du fichier (sans décodage) et taille de
+    l'image à laquelle il est redimensionné.
+    """
+    digest = hashlib.blake2b(mask_bytes, digest_size=16)
+    digest.update(repr(image_shape[:2]).encode())
+    return digest.hexdigest()
+
+class FingerprintMemo:
+    """
+    Mémoire des dernières extractions, par scan et par empreinte de masque.
+
+    Les rawframes BUV sont des images consécutives d'une vidéo : beaucoup de
+    masques voisins sont identiques octet pour octet. Leurs boxes ne sont
+    calculées qu'une fois tant que l'empreinte reste en mémoire.
+    """
+    def __init__(self, size=256):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, scan_folder, fingerprint):
+        """
+        Returns:
+            Tuple (statut, boxes) déjà calculé pour ce masque, None sinon
+        """
+        key = (scan_folder, fingerprint)
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+            return result
+
+    def put(self, scan_folder, fingerprint, status, boxes):
+        """Mémorise le résultat d'une extraction"""
+        with self.lock:
+            self.entries[(scan_folder, fingerprint)] = (status, boxes)
+            self.entries.move_to_end((scan_folder, fingerprint))
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
@@ -0,0 +1,162 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+
+from utils.image_header import read_image_size
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+# Nombre de vidéos ouvertes à la fois par processus
+MAX_OPEN_VIDEOS = 4
+
+def video_frame_path(video_path, index):
+    """Chemin d'une image de vidéo dans une tâche : "video.mp4#index" """
+    return f"{video_path}#{index}"
+
+def split_frame_path(img_path):
+    """
+    Returns:
+        Tuple (chemin de la vidéo, indice de l'image), ou (img_path, None)
+        pour une image stockée dans un fichier
+    """
+    path, sep, index = img_path.rpartition('#')
+    if sep and index.isdigit() and path.lower().endswith(VIDEO_EXTENSIONS):
+        return path, int(index)
+    return img_path, None
+
+def source_file(img_path):
+    """Fichier qui contient l'image (la vidéo pour une image de vidéo)"""
+    return split_frame_path(img_path)[0]
+
+class DirectorySource:
+    """Images extraites (rawframes) : un fichier PNG/JPEG par image"""
+    def read(self, path):
+        return cv2.imread(path)
+
+    def size(self, path):
+        """Taille (hauteur, largeur) lue dans l'en-tête, sans décodage"""
+        return read_image_size(path)
+
+class VideoSource:
+    """
+    Vidéo d'un scan, décodée en avançant : l'image i est associée au masque
+    i du dossier de masques du scan.
+
+    La vidéo n'est jamais parcourue par recherche (CAP_PROP_POS_FRAMES) : une
+    reprise au milieu du scan, une relecture en arrière ou une réouverture
+    après fermeture (MAX_OPEN_VIDEOS) repartent de la première image. Les dernières images décodées sont gardées pour les lectures
+    légèrement désordonnées (plusieurs threads de préchargement) : les images
+    sautées à moins de buffer_size images de l'image demandée sont décodées
+    et gardées, celles d'un saut plus long sont passées avec grab() sans
+    décodage. Une image plus ancienne que le tampon impose de rouvrir la vidéo.
+    """
+    def __init__(self, path, buffer_size=16):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = OrderedDict()
+        self.capture = None
+        self.position = 0
+        self.frame_size = None
+        self.size_read = False
+        self.lock = threading.Lock()
+
+    def _open(self):
+        """
+        (Ré)ouvre la vidéo sur sa première image. Pas de recherche avec
+        CAP_PROP_POS_FRAMES : elle n'est pas précise à l'image près pour les
+        codecs inter-images, et l'image serait associée au mauvais masque.
+        """
+        if self.capture is not None:
+            self.capture.release()
+        self.capture = cv2.VideoCapture(self.path)
+        self.position = 0
+
+    def read(self, index):
+        """Image index de la vidéo (BGR), ou None si elle n'existe pas"""
+        with self.lock:
+            frame = self.buffer.get(index)
+            if frame is not None:
+                return frame
+            if self.capture is None or index < self.position:
+                self._open()
+            # Images sautées : décodées et gardées si elles sont proches (un
+            # autre thread les demandera sans doute), démultiplexées sinon
+            while self.position < index:
+                if index - self.position <= self.buffer_size:
+                    ok, skipped = self.capture.read()
+                    if ok:
+                        self._keep(self.position, skipped)
+                else:
+                    ok = self.capture.grab()
+                if not ok:
+                    return None
+                self.position += 1
+            ok, frame = self.capture.read()
+            if not ok:
+                return None
+            self.position += 1
+            self._keep(index, frame)
+            return frame
+
+    def _keep(self, index, frame):
+        """Garde une image décodée (les plus anciennes sortent du tampon)"""
+        self.buffer[index] = frame
+        while len(self.buffer) > self.buffer_size:
+            self.buffer.popitem(last=False)
+
+    def size(self):
+        """
+        Taille (hauteur, largeur) des images, lue dans le conteneur sans
+        décodage ; le conteneur n'est interrogé qu'une fois par vidéo.
+        """
+        with self.lock:
+            if not self.size_read:
+                capture = self.capture if self.capture is not None else cv2.VideoCapture(self.path)
+                height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+                if capture is not self.capture:
+                    capture.release()
+                self.frame_size = (height, width) if height > 0 and width > 0 else None
+                self.size_read = True
+            return self.frame_size
+
+    def close(self):
+        with self.lock:
+            if self.capture is not None:
+                self.capture.release()
+                self.capture = None
+            self.buffer.clear()
+
+_directory_source = DirectorySource()
+_videos = OrderedDict()
+_videos_lock = threading.Lock()
+
+def _video(path):
+    """Lecteur partagé d'une vidéo (les moins récemment utilisés sont fermés)"""
+    with _videos_lock:
+        source = _videos.get(path)
+        if source is None:
+            source = VideoSource(path)
+            _videos[path] = source
+        _videos.move_to_end(path)
+        while len(_videos) > MAX_OPEN_VIDEOS:
+            _videos.popitem(last=False)[1].close()
+        return source
+
+def read_frame(img_path):
+    """Décode une image, qu'elle soit stockée dans un fichier ou dans une vidéo"""
+    path, index = split_frame_path(img_path)
+    if index is None:
+        return _directory_source.read(path)
+    return _video(path).read(index)
+
+def frame_size(img_path):
+    """
+    Taille (hauteur, largeur) d'une image sans la décoder, ou None si elle
+    ne peut pas être lue ainsi.
+    """
+    path, index = split_frame_path(img_path)
+    if index is None:
+        return _directory_source.size(path)
+    return _video(path).size()
@@ -0,0 +1,95 @@
+import tkinter as tk
+from tkinter import ttk
+from PIL import Image, ImageTk
+import cv2
+
+from utils import metrics
+
+# Couleur du cadre d'une vignette : normale ou marquée à rejeter
+TILE_COLOR = "#d9d9d9"
+MARKED_COLOR = "#e02020"
+
+class GridGUI:
+    """
+    Grille de columns x columns vignettes. Un clic marque (ou démarque) une
+    vignette ; Espace/Entrée valide toute la page sauf les vignettes
+    marquées, qui sont rejetées.
+    """
+    def __init__(self, root, columns, on_accept, on_quit, on_save):
+        self.root = root
+        self.root.title("Validation des Bounding Boxes (grille)")
+        self.columns = columns
+        self.on_accept = on_accept
+        self.on_quit = on_quit
+        self.on_save = on_save
+        self.marked = set()
+        self.photos = []
+        self.count = 0
+        self.info = ""
+
+        main_frame = ttk.Frame(self.root)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        grid_frame = ttk.Frame(main_frame)
+        grid_frame.pack()
+
+        self.tiles = []
+        for index in range(columns * columns):
+            tile = tk.Label(grid_frame, highlightthickness=3, highlightbackground=TILE_COLOR, bd=0)
+            tile.grid(row=index // columns, column=index % columns, padx=1, pady=1)
+            tile.bind('<Button-1>', lambda e, i=index: self.toggle(i))
+            self.tiles.append(tile)
+
+        self.status_label = ttk.Label(main_frame, text="")
+        self.status_label.pack(fill=tk.X, pady=5)
+
+        self.root.bind('<space>', lambda e: self.handle_accept())
+        self.root.bind('<Return>', lambda e: self.handle_accept())
+        self.root.bind('q', lambda e: self.on_quit())
+        self.root.bind('Q', lambda e: self.on_quit())
+        self.root.bind('<Control-s>', lambda e: self.on_save())
+        self.root.bind('<Control-S>', lambda e: self.on_save())
+
+    def show_status(self, text):
+        """Affiche un message d'état sous la grille"""
+        self.status_label.config(text=text)
+
+    def show_page(self, thumbnails, info):
+        """
+        Affiche une page de vignettes (BGR, déjà réduites) ; les cases en
+        trop sont vidées.
+        """
+        with metrics.timer('photo_image'):
+            self.photos = [ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(thumbnail, cv2.COLOR_BGR2RGB)))
+                           for thumbnail in thumbnails]
+        for index, tile in enumerate(self.tiles):
+            if index < len(self.photos):
+                tile.config(image=self.photos[index], highlightbackground=TILE_COLOR)
+                tile.grid()
+            else:
+                tile.config(image='')
+                tile.grid_remove()
+        self.count = len(self.photos)
+        self.marked = set()
+        self.info = info
+        self.update_status()
+
+    def update_status(self):
+        self.show_status(f"{self.info} | {self.count} images, {len(self.marked)} à rejeter "
+                         f"| Clic : marquer | Espace : valider la page | Q : quitter")
+
+    def toggle(self, index):
+        """Marque ou démarque une vignette"""
+        if index >= self.count:
+            return
+        if index in self.marked:
+            self.marked.discard(index)
+            self.tiles[index].config(highlightbackground=TILE_COLOR)
+        else:
+            self.marked.add(index)
+            self.tiles[index].config(highlightbackground=MARKED_COLOR)
+        self.update_status()
+
+    def handle_accept(self):
+        """Valide la page, sauf les vignettes marquées"""
+        if self.count:
+            self.on_accept(set(self.marked))
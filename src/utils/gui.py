@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
-import cv2
-import numpy as np
+
+from utils import metrics
+
+# PIL, OpenCV et NumPy sont importés au premier affichage d'une image, pour
+# que la fenêtre apparaisse sans attendre leur chargement
 
 class BBoxGUI:
-    def __init__(self, root, on_validate, on_reject, on_quit, on_save):
+    def __init__(self, root, on_validate, on_reject, on_quit, on_save, on_render=None):
         self.root = root
         self.root.title("Validation des Bounding Boxes")
         
@@ -14,12 +16,20 @@ class BBoxGUI:
         self.on_reject = on_reject
         self.on_quit = on_quit
         self.on_save = on_save
+        self.on_render = on_render
         
         # Variables d'état
         self.current_alpha = 0.3
         self.mask_enabled = True
         self.show_help = True
         self.current_lang = 'fr'
+        self.default_display_size = (800, 600)
+        
+        # Calques affichés (tableaux OpenCV) et PhotoImage de chaque label
+        self.shown_layers = {}
+        self.photos = {}
+        self.image_area = None
+        self.mask_area = None
         
         # Configuration de la fenêtre
         self.setup_window()
@@ -85,6 +95,9 @@ class BBoxGUI:
         self.bbox_label = ttk.Label(self.image_frame)
         self.bbox_label.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
+        # Nouveau rendu à la taille de la fenêtre
+        self.image_frame.bind('<Configure>', lambda e: self.request_render())
+        
         # Frame pour les informations
         self.info_frame = ttk.Frame(main_frame)
         self.info_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -136,26 +149,54 @@ class BBoxGUI:
         self.root.bind('h', lambda e: self.handle_toggle_help())
         self.root.bind('H', lambda e: self.handle_toggle_help())
         
+    def display_size(self):
+        """
+        Taille disponible (largeur, hauteur) pour chacune des deux images.
+        """
+        width = self.image_frame.winfo_width() // 2
+        height = self.image_frame.winfo_height()
+        if width <= 1 or height <= 1:
+            # Fenêtre pas encore affichée
+            return self.default_display_size
+        return (width, height)
+        
     def update_image(self, overlay_img, bbox_img):
-        """Met à jour l'affichage des images"""
+        """
+        Met à jour l'affichage des images (déjà à la taille d'affichage,
+        voir display_size).
+        
+        Seuls les calques qui ont changé sont convertis : un changement de
+        transparence ne touche pas l'image des boxes. Une image de même
+        taille est copiée dans la PhotoImage existante au lieu d'en créer une.
+        """
+        with metrics.timer('photo_image'):
+            self._show_layer('overlay', self.overlay_label, overlay_img)
+            self._show_layer('bbox', self.bbox_label, bbox_img)
+            
+    def _show_layer(self, name, label, image):
+        """Affiche un calque dans son label s'il n'y est pas déjà"""
+        import cv2
+        from PIL import Image, ImageTk
+        if self.shown_layers.get(name) is image:
+            return
         # Conversion OpenCV vers PIL
-        overlay_pil = Image.fromarray(cv2.cvtColor(overlay_img, cv2.COLOR_BGR2RGB))
-        bbox_pil = Image.fromarray(cv2.cvtColor(bbox_img, cv2.COLOR_BGR2RGB))
-        
-        # Redimensionnement
-        overlay_pil = overlay_pil.resize((800, 600), Image.Resampling.LANCZOS)
-        bbox_pil = bbox_pil.resize((800, 600), Image.Resampling.LANCZOS)
-        
-        # Conversion vers PhotoImage
-        self.overlay_photo = ImageTk.PhotoImage(overlay_pil)
-        self.bbox_photo = ImageTk.PhotoImage(bbox_pil)
-        
-        # Mise à jour des labels
-        self.overlay_label.config(image=self.overlay_photo)
-        self.bbox_label.config(image=self.bbox_photo)
+        pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        photo = self.photos.get(name)
+        if photo is not None and (photo.width(), photo.height()) == pil_image.size:
+            photo.paste(pil_image)
+        else:
+            photo = ImageTk.PhotoImage(pil_image)
+            self.photos[name] = photo
+            label.config(image=photo)
+        self.shown_layers[name] = image
+        
+    def show_status(self, text):
+        """Affiche un message d'état (chargement) à la place des informations de l'image"""
+        self.scan_label.config(text=text)
         
     def update_info(self, scan_name, image_name, boxes_count, image_size=None, boxes=None, mask=None):
         """Met à jour les informations affichées"""
+        import cv2
         # Informations de base
         self.scan_label.config(text=f"Scan: {scan_name}")
         self.image_label.config(text=f"Image: {image_name}")
@@ -183,19 +224,33 @@ class BBoxGUI:
             
             # Informations sur le masque
             if mask is not None:
-                mask_area = np.sum(mask > 0)
-                mask_info = f"Transparence: {self.current_alpha:.2f}\n"
-                mask_info += f"Superficie masque: {mask_area} pixels\n"
-                mask_info += f"Couvrance: {mask_area/image_area*100:.2f}%"
-                self.mask_details.config(text=mask_info)
+                self.image_area = image_area
+                self.mask_area = cv2.countNonZero(mask)
+                self.update_mask_info()
+                
+    def update_mask_info(self):
+        """Met à jour les informations du masque (transparence courante)"""
+        if self.mask_area is None:
+            return
+        mask_info = f"Transparence: {self.current_alpha:.2f}\n"
+        mask_info += f"Superficie masque: {self.mask_area} pixels\n"
+        mask_info += f"Couvrance: {self.mask_area/self.image_area*100:.2f}%"
+        self.mask_details.config(text=mask_info)
         
     def handle_alpha(self, delta):
         """Gère le changement de transparence"""
         self.current_alpha = max(0.0, min(1.0, self.current_alpha + delta))
+        self.request_render()
         
     def handle_toggle_mask(self):
         """Gère l'activation/désactivation du masque"""
         self.mask_enabled = not self.mask_enabled
+        self.request_render()
+        
+    def request_render(self):
+        """Demande un nouveau rendu de l'image courante"""
+        if self.on_render:
+            self.on_render()
         
     def handle_switch_language(self):
         """Gère le changement de langue"""
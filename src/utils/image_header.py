@@ -0,0 +1,109 @@
+import struct
+
+# Marqueurs JPEG SOF (début de trame) qui portent la taille de l'image
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def _png_size(head):
+    """Taille lue dans le bloc IHDR, juste après la signature PNG"""
+    if len(head) < 24 or head[12:16] != b'IHDR':
+        return None
+    width, height = struct.unpack('>II', head[16:24])
+    return height, width
+
+# Orientations EXIF qui font pivoter l'image d'un quart de tour
+# (cv2.imread les applique : hauteur et largeur sont alors échangées)
+_EXIF_TRANSPOSED = {5, 6, 7, 8}
+
+def _exif_orientation(data):
+    """Orientation (tag 0x0112 de l'IFD0) d'un segment APP1 Exif, ou None"""
+    if not data.startswith(b'Exif\x00\x00'):
+        return None
+    tiff = data[6:]
+    if tiff[:2] == b'II':
+        order = '<'
+    elif tiff[:2] == b'MM':
+        order = '>'
+    else:
+        return None
+    try:
+        offset = struct.unpack(order + 'I', tiff[4:8])[0]
+        count = struct.unpack(order + 'H', tiff[offset:offset + 2])[0]
+        for i in range(count):
+            entry = tiff[offset + 2 + 12 * i:offset + 14 + 12 * i]
+            tag, kind = struct.unpack(order + 'HH', entry[:4])
+            if tag == 0x0112 and kind == 3:
+                return struct.unpack(order + 'H', entry[8:10])[0]
+    except struct.error:
+        return None
+    return None
+
+def _jpeg_size(f):
+    """
+    Taille lue dans le premier segment SOF, en sautant les autres segments ;
+    hauteur et largeur sont échangées si l'orientation EXIF (segment APP1)
+    fait pivoter l'image, comme le fait cv2.imread.
+    """
+    f.seek(2)
+    orientation = None
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff':
+            byte = f.read(1)
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        # Marqueurs sans segment (RSTn, TEM)
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            continue
+        header = f.read(2)
+        if len(header) < 2:
+            return None
+        length = struct.unpack('>H', header)[0]
+        if marker in _JPEG_SOF_MARKERS:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack('>HH', data[1:5])
+            if orientation in _EXIF_TRANSPOSED:
+                return width, height
+            return height, width
+        if marker == 0xE1 and orientation is None:
+            orientation = _exif_orientation(f.read(length - 2))
+            continue
+        f.seek(length - 2, 1)
+
+def _bmp_size(head):
+    """Taille lue dans l'en-tête BITMAPINFOHEADER"""
+    if len(head) < 26:
+        return None
+    width, height = struct.unpack('<ii', head[18:26])
+    return abs(height), width
+
+def read_image_size(path):
+    """
+    Lit la taille d'une image PNG, JPEG ou BMP dans l'en-tête du fichier,
+    sans décoder les pixels. Pour un JPEG, l'orientation EXIF est prise en
+    compte : la taille est celle de l'image retournée par cv2.imread.
+
+    Returns:
+        Tuple (hauteur, largeur), ou None si le fichier est illisible ou d'un
+        autre format
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(32)
+            if head.startswith(b'\x89PNG\r\n\x1a\n'):
+                size = _png_size(head)
+            elif head.startswith(b'\xff\xd8'):
+                size = _jpeg_size(f)
+            elif head.startswith(b'BM'):
+                size = _bmp_size(head)
+            else:
+                size = None
+    except OSError:
+        return None
+    if size is None or size[0] <= 0 or size[1] <= 0:
+        return None
+    return size
@@ -0,0 +1,280 @@
+import os
+import json
+import queue
+import threading
+
+from utils.batch import write_results
+from utils.atomic import atomic_open
+from utils import metrics
+
+# Délai avant de réessayer l'écriture de décisions en échec, en secondes
+RETRY_DELAY = 5.0
+
+class ValidationJournal:
+    """
+    Journal des décisions en ajout seul (une ligne JSON par décision).
+
+    Chaque validation ou rejet coûte une seule écriture de ligne, quel que soit
+    le nombre d'annotations déjà enregistrées. Les fichiers JSON/CSV habituels
+    sont produits à la demande par export_results().
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+        # Dernière ligne tronquée (arrêt brutal pendant l'écriture) : la
+        # terminer pour que la prochaine décision ne s'y colle pas
+        if self.file.tell() > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self.file.write("\n")
+                    self.file.flush()
+
+    @staticmethod
+    def record(scan, image, valid, boxes=None, carried_from=None, triage_score=None):
+        """
+        Ligne de journal d'une décision.
+
+        carried_from indique l'image dont la décision a été reprise
+        (masques identiques consécutifs) ; triage_score, le score d'une
+        image validée automatiquement (voir utils/triage.py).
+        """
+        record = {"scan": scan, "image": image, "valid": valid}
+        if valid:
+            record["boxes"] = boxes
+        if carried_from is not None:
+            record["carried_from"] = carried_from
+        if triage_score is not None:
+            record["triage_score"] = round(triage_score, 4)
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    def append(self, scan, image, valid, boxes=None, carried_from=None, triage_score=None):
+        """Ajoute une décision au journal (voir record)"""
+        self.file.write(self.record(scan, image, valid, boxes, carried_from, triage_score))
+        self.file.flush()
+
+    def append_lines(self, lines):
+        """Ajoute plusieurs décisions en une seule écriture"""
+        self.file.write("".join(lines))
+        self.file.flush()
+
+    def close(self):
+        """Ferme le journal"""
+        if not self.file.closed:
+            self.file.close()
+
+class AsyncJournal:
+    """
+    Journal écrit par un thread dédié : append() ne fait que mettre la
+    décision en file et ne bloque jamais le thread de l'interface.
+
+    Les décisions arrivées en rafale sont écrites en une seule fois. L'export
+    JSON/CSV est relancé après delay secondes sans nouvelle décision (0 pour
+    ne l'exporter que sur demande), sur save() et à la fermeture.
+
+    Une écriture ou un export en échec n'arrête pas le thread : les décisions
+    non écrites sont gardées et réessayées au passage suivant, et l'erreur est
+    remontée à l'interface par take_error().
+    """
+    def __init__(self, journal, export=None, delay=5.0):
+        """
+        Args:
+            journal: ValidationJournal à alimenter
+            export: Fonction d'export des résultats (appelée par le thread)
+            delay: Délai d'inactivité avant l'export automatique, en secondes
+        """
+        self.journal = journal
+        self.export = export
+        self.delay = delay
+        self.queue = queue.Queue()
+        self.pending = []
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self.thread.start()
+
+    def append(self, scan, image, valid, boxes=None, carried_from=None, triage_score=None):
+        """Met une décision en file d'écriture (voir ValidationJournal.record)"""
+        self.queue.put(("append", ValidationJournal.record(scan, image, valid, boxes, carried_from,
+                                                           triage_score)))
+
+    def save(self):
+        """Demande un export dès que les décisions en file sont écrites"""
+        self.queue.put(("save", None))
+
+    def take_error(self):
+        """Dernière erreur d'écriture ou d'export depuis l'appel précédent (None sinon)"""
+        error, self.error = self.error, None
+        return error
+
+    def close(self):
+        """
+        Écrit les décisions en file, exporte les résultats et arrête le thread.
+
+        Les décisions que le thread n'a pas pu écrire sont écrites ici ; une
+        nouvelle erreur est alors levée plutôt que de les perdre en silence.
+        """
+        if self.thread.is_alive():
+            self.queue.put(("close", None))
+            self.thread.join()
+        self.pending.extend(value for kind, value in self._drain() if kind == "append")
+        try:
+            if self.pending:
+                self.journal.append_lines(self.pending)
+                self.pending = []
+        finally:
+            self.journal.close()
+
+    def _drain(self):
+        """Retire sans attendre tous les éléments en file"""
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _fail(self, action, error):
+        print(f"{action} impossible : {error}")
+        self.error = error
+
+    def _export(self):
+        if self.export is None:
+            return
+        try:
+            self.export()
+        except Exception as e:
+            self._fail("Export des résultats", e)
+
+    def _run(self):
+        dirty = False
+        while True:
+            timeout = self.delay if dirty and self.export is not None and self.delay > 0 else None
+            if self.pending:
+                # Décisions en échec : réessayées même sans nouvelle décision
+                timeout = min(timeout or RETRY_DELAY, RETRY_DELAY)
+            try:
+                items = [self.queue.get(timeout=timeout)]
+            except queue.Empty:
+                # Pas de nouvelle décision depuis delay secondes
+                items = [("idle", None)]
+            items.extend(self._drain())
+            kinds = {kind for kind, _ in items}
+
+            try:
+                self.pending.extend(value for kind, value in items if kind == "append")
+                if self.pending:
+                    self.journal.append_lines(self.pending)
+                    self.pending = []
+                    dirty = True
+            except Exception as e:
+                self._fail("Écriture du journal", e)
+            if "save" in kinds or "close" in kinds or ("idle" in kinds and dirty):
+                self._export()
+                dirty = False
+            if "close" in kinds:
+                return
+
+def read_journal(path):
+    """
+    Relit les décisions du journal dans l'ordre d'écriture.
+
+    Une ligne tronquée (arrêt brutal pendant l'écriture) est ignorée.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+def seed_journal(path, validations_file, output_json):
+    """
+    Initialise le journal à partir des anciens validations.json et
+    bounding_boxes.json, pour ne pas perdre l'historique lors du passage au
+    journal.
+    """
+    if os.path.exists(path) or not os.path.exists(validations_file):
+        return
+    with open(validations_file, 'r', encoding='utf-8') as f:
+        validations = json.load(f)
+    bounding_boxes = {}
+    if os.path.exists(output_json):
+        with open(output_json, 'r', encoding='utf-8') as f:
+            bounding_boxes = json.load(f)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for validation in validations:
+            record = dict(validation)
+            key_str = f"{record['scan']}/{record['image']}"
+            if record["valid"] and key_str in bounding_boxes:
+                record["boxes"] = bounding_boxes[key_str]
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def replay_journal(path):
+    """
+    Rejoue le journal ; la dernière décision sur une image l'emporte.
+
+    Returns:
+        Tuple (bounding_boxes, bad_cases, validations)
+    """
+    bounding_boxes = {}
+    rejected = {}
+    validations = []
+    for record in read_journal(path):
+        key_str = f"{record['scan']}/{record['image']}"
+        validations.append({"scan": record["scan"], "image": record["image"], "valid": record["valid"]})
+        if record["valid"] and "boxes" in record:
+            bounding_boxes[key_str] = record["boxes"]
+            rejected.pop(key_str, None)
+        elif not record["valid"]:
+            bounding_boxes.pop(key_str, None)
+            rejected[key_str] = True
+    return bounding_boxes, list(rejected), validations
+
+def resume_manifest(path, manifest):
+    """
+    Marque dans l'index du dataset les images déjà décidées dans le journal
+    et place son parcours sur la première image non traitée.
+
+    Returns:
+        Tuple (bounding_boxes, bad_cases, validations) rejoué (voir replay_journal)
+    """
+    bounding_boxes, bad_cases, validations = replay_journal(path)
+    for key_str in bounding_boxes:
+        manifest.mark(key_str)
+    for key_str in bad_cases:
+        manifest.mark(key_str)
+    manifest.seek_first_pending()
+    return bounding_boxes, bad_cases, validations
+
+def export_configured(config):
+    """
+    Exporte le journal des interfaces de relecture vers les fichiers de la
+    configuration (module config : JOURNAL_FILE, OUTPUT_JSON, etc.) et écrit
+    les mesures dans METRICS_FILE.
+
+    Returns:
+        Tuple (bounding_boxes, bad_cases, BoxStore)
+    """
+    with metrics.timer('save_results'):
+        results = export_results(config.JOURNAL_FILE, config.OUTPUT_JSON, config.OUTPUT_CSV,
+                                 config.BAD_CASES_FILE, config.VALIDATIONS_FILE, config.RESULTS_STORE_DIR)
+    metrics.dump(config.METRICS_FILE)
+    return results
+
+def export_results(path, output_json, output_csv, bad_cases_file, validations_file, store_dir=None):
+    """
+    Compacte le journal et produit les fichiers JSON/CSV habituels, ainsi que
+    le stockage en colonnes si store_dir est donné.
+
+    Returns:
+        Tuple (bounding_boxes, bad_cases, BoxStore)
+    """
+    bounding_boxes, bad_cases, validations = replay_journal(path)
+    store = write_results(bounding_boxes, bad_cases, output_json, output_csv, bad_cases_file,
+                          store_dir=store_dir)
+    with atomic_open(validations_file, 'w', encoding='utf-8') as f:
+        json.dump(validations, f, indent=2, ensure_ascii=False)
+    return bounding_boxes, bad_cases, store
@@ -0,0 +1,210 @@
+import os
+import json
+import hashlib
+from bisect import bisect_left
+
+from utils.frame_source import VIDEO_EXTENSIONS, video_frame_path
+from utils.atomic import atomic_open
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def list_scan_images(scan_path):
+    """
+    Liste triée des images d'un dossier de scan.
+    """
+    with os.scandir(scan_path) as it:
+        return sorted(entry.name for entry in it if entry.name.endswith(IMAGE_EXTENSIONS))
+
+def parse_shard(text):
+    """
+    Lit une partition "i/N" (i de 1 à N).
+
+    Returns:
+        Tuple (i, N), ou None si text est vide
+    """
+    if not text:
+        return None
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise ValueError(f"Partition invalide : {text!r} (attendu i/N, par exemple 1/4)")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Partition invalide : {text!r} (i doit être compris entre 1 et N)")
+    return index, count
+
+def shard_of(scan_folder, count):
+    """
+    Partition (de 1 à count) d'un dossier de scan, par hachage stable de son
+    nom : identique sur toutes les machines et d'une exécution à l'autre.
+    """
+    digest = hashlib.blake2b(scan_folder.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % count + 1
+
+class DatasetManifest:
+    """
+    Index ordonné du dataset (scan, image, chemin du masque) et ensemble des
+    images déjà traitées.
+
+    L'index est construit une seule fois avec os.scandir puis mis en cache sur
+    disque. Au chargement, seul le mtime de chaque dossier de scan est vérifié :
+    un dossier modifié est relu, les autres sont repris du cache.
+
+    Un scan est soit un dossier d'images, soit une vidéo "<scan>.mp4" (ou
+    .avi, .mov, .mkv) : ses images sont alors celles du dossier de masques
+    du scan, et l'image i de la vidéo est associée au i-ème masque.
+
+    Avec shard=(i, N), seuls les scans de la partition i sont retenus (voir
+    shard_of) ; le cache sur disque garde l'index complet.
+    """
+    def __init__(self, image_base_dir, mask_base_dir, cache_file=None, shard=None):
+        self.image_base_dir = image_base_dir
+        self.mask_base_dir = mask_base_dir
+        self.cache_file = cache_file
+        self.shard = shard
+
+        self.scans = {}
+        self.entries = []
+        self.offsets = {}
+        self.decided = set()
+        self.decided_per_scan = {}
+        self.cursor = 0
+
+        self._load()
+
+    def _read_cache(self):
+        """Lit le cache s'il correspond aux mêmes dossiers"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("image_base_dir") != os.path.abspath(self.image_base_dir):
+            return {}
+        return data.get("scans", {})
+
+    def _write_cache(self):
+        """Écrit l'index sur disque"""
+        data = {
+            "image_base_dir": os.path.abspath(self.image_base_dir),
+            "scans": self.scans
+        }
+        with atomic_open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def _load(self):
+        """Construit l'index en réutilisant le cache des dossiers inchangés"""
+        cached_scans = self._read_cache()
+        changed = False
+
+        with os.scandir(self.image_base_dir) as it:
+            sources = {}
+            for entry in it:
+                if entry.is_dir():
+                    sources[entry.name] = (entry.path, None)
+                elif entry.name.lower().endswith(VIDEO_EXTENSIONS):
+                    scan_folder = os.path.splitext(entry.name)[0]
+                    sources[scan_folder] = (os.path.join(self.mask_base_dir, scan_folder), entry.name)
+
+        for scan_folder in sorted(sources):
+            # Les images d'un scan vidéo sont listées dans son dossier de masques
+            list_dir, video = sources[scan_folder]
+            try:
+                mtime = os.stat(list_dir).st_mtime_ns
+            except OSError:
+                continue
+            scan = cached_scans.get(scan_folder)
+            if scan is None or scan["mtime"] != mtime or scan.get("video") != video:
+                scan = {"mtime": mtime, "images": list_scan_images(list_dir)}
+                if video is not None:
+                    scan["video"] = video
+                changed = True
+            self.scans[scan_folder] = scan
+
+        if len(self.scans) != len(cached_scans):
+            changed = True
+        if changed and self.cache_file:
+            self._write_cache()
+
+        if self.shard is not None:
+            index, count = self.shard
+            self.scans = {scan_folder: scan for scan_folder, scan in self.scans.items()
+                          if shard_of(scan_folder, count) == index}
+
+        for scan_folder, scan in self.scans.items():
+            self.offsets[scan_folder] = len(self.entries)
+            self.entries.extend((scan_folder, img_name) for img_name in scan["images"])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def task(self, scan_folder, img_name, params=None):
+        """
+        Construit la tâche d'extraction d'une image.
+
+        Args:
+            params: Paramètres d'extraction passés à extract_boxes
+        Returns:
+            Tuple (scan_folder, img_name, img_path, mask_path, params)
+        """
+        mask_path = os.path.join(self.mask_base_dir, scan_folder, img_name)
+        video = self.scans[scan_folder].get("video")
+        if video is not None:
+            index = bisect_left(self.scans[scan_folder]["images"], img_name)
+            img_path = video_frame_path(os.path.join(self.image_base_dir, video), index)
+        else:
+            img_path = os.path.join(self.image_base_dir, scan_folder, img_name)
+        return (scan_folder, img_name, img_path, mask_path, params or {})
+
+    def contains(self, scan_folder, img_name):
+        """Indique si une image fait partie du dataset (recherche dichotomique)"""
+        scan = self.scans.get(scan_folder)
+        if scan is None:
+            return False
+        images = scan["images"]
+        i = bisect_left(images, img_name)
+        return i < len(images) and images[i] == img_name
+
+    def mark(self, key_str):
+        """Marque une image "scan/image" comme traitée"""
+        if key_str in self.decided:
+            return
+        self.decided.add(key_str)
+        scan_folder, img_name = key_str.split('/', 1)
+        if self.contains(scan_folder, img_name):
+            self.decided_per_scan[scan_folder] = self.decided_per_scan.get(scan_folder, 0) + 1
+
+    def seek_first_pending(self):
+        """
+        Place le curseur au début du premier scan pas encore terminé.
+
+        Les scans entièrement traités sont sautés d'un bloc : le coût dépend du
+        nombre de scans et de décisions, pas du nombre d'images du dataset.
+        """
+        for scan_folder, scan in self.scans.items():
+            offset = self.offsets[scan_folder]
+            if offset < self.cursor:
+                continue
+            if self.decided_per_scan.get(scan_folder, 0) < len(scan["images"]):
+                self.cursor = offset
+                return
+        self.cursor = len(self.entries)
+
+    def is_decided(self, key_str):
+        """Indique si une image a déjà été traitée"""
+        return key_str in self.decided
+
+    def iter_pending(self, params=None):
+        """
+        Génère les tâches des images pas encore traitées, à partir du curseur.
+
+        Le curseur ne revient jamais en arrière : trouver l'image suivante
+        coûte O(1) amorti sur toute la session.
+        """
+        while self.cursor < len(self.entries):
+            scan_folder, img_name = self.entries[self.cursor]
+            self.cursor += 1
+            if f"{scan_folder}/{img_name}" in self.decided:
+                continue
+            yield self.task(scan_folder, img_name, params)
@@ -0,0 +1,105 @@
+import os
+import json
+
+from utils.journal import ValidationJournal, read_journal, replay_journal
+
+# Résolution d'une image décidée différemment dans plusieurs partitions
+CONFLICT_POLICIES = ('reject', 'first', 'last')
+
+def read_shard(path):
+    """
+    Décisions finales d'une partition : journal .jsonl (la dernière décision
+    sur une image l'emporte) ou bounding_boxes .json. Un .json ne contient
+    que les images validées : les images rejetées de la partition (to_fix.txt)
+    n'entrent ni dans la fusion ni dans la détection des conflits ; préférer
+    le journal écrit par batch.py --shard.
+
+    Returns:
+        Générateur de tuples (clé "scan/image", validée, boxes)
+    """
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            bounding_boxes = json.load(f)
+        for key_str, boxes in bounding_boxes.items():
+            yield key_str, True, boxes
+        return
+    bounding_boxes, bad_cases, _ = replay_journal(path)
+    for key_str, boxes in bounding_boxes.items():
+        yield key_str, True, boxes
+    for key_str in bad_cases:
+        yield key_str, False, None
+
+def shard_scans(path):
+    """Ensemble des scans présents dans une partition"""
+    if path.endswith('.json'):
+        return {key_str.split('/', 1)[0] for key_str, _, _ in read_shard(path)}
+    return {record["scan"] for record in read_journal(path)}
+
+def merge_shards(paths, output, conflicts_file=None, policy='reject'):
+    """
+    Fusionne les résultats de plusieurs partitions dans un seul journal.
+
+    Les partitions sont lues l'une après l'autre. Les images des scans
+    présents dans une seule partition (cas normal avec --shard) sont écrites
+    au fil de la lecture ; seules celles des scans présents dans plusieurs
+    partitions sont gardées en mémoire pour être comparées. Deux décisions
+    différentes sur une même image (validée/rejetée, ou boxes différentes)
+    forment un conflit, résolu selon policy :
+        'reject': l'image est rejetée (à revoir manuellement)
+        'first' / 'last': la décision de la première / dernière partition est gardée
+
+    Returns:
+        Tuple (nombre d'images écrites, nombre de conflits)
+    """
+    if os.path.abspath(output) in {os.path.abspath(path) for path in paths}:
+        raise ValueError(f"Le fichier de sortie {output} fait partie des partitions à fusionner")
+
+    # Premier passage : scans présents dans plusieurs partitions
+    owners = {}
+    shared = set()
+    for index, path in enumerate(paths):
+        for scan in shard_scans(path):
+            if owners.setdefault(scan, index) != index:
+                shared.add(scan)
+
+    open(output, 'w').close()
+    journal = ValidationJournal(output)
+    written = 0
+    contested = {}
+    try:
+        for path in paths:
+            for key_str, valid, boxes in read_shard(path):
+                scan, image = key_str.split('/', 1)
+                if scan in shared:
+                    contested.setdefault(key_str, []).append((path, valid, boxes))
+                    continue
+                journal.append(scan, image, valid, boxes)
+                written += 1
+
+        conflicts = 0
+        report = open(conflicts_file, 'w', encoding='utf-8') if conflicts_file else None
+        try:
+            for key_str, decisions in contested.items():
+                scan, image = key_str.split('/', 1)
+                _, valid, boxes = decisions[0]
+                agree = all(other_valid == valid and other_boxes == boxes
+                            for _, other_valid, other_boxes in decisions[1:])
+                if not agree:
+                    conflicts += 1
+                    if report is not None:
+                        record = {"key": key_str, "decisions": [
+                            {"shard": path, "valid": other_valid, "boxes": other_boxes}
+                            for path, other_valid, other_boxes in decisions]}
+                        report.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    if policy == 'reject':
+                        valid, boxes = False, None
+                    elif policy == 'last':
+                        _, valid, boxes = decisions[-1]
+                journal.append(scan, image, valid, boxes)
+                written += 1
+        finally:
+            if report is not None:
+                report.close()
+    finally:
+        journal.close()
+    return written, conflicts
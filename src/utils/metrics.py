@@ -0,0 +1,169 @@
+import json
+import threading
+from time import perf_counter
+
+# Bornes des histogrammes de latence, en secondes
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+class _NullTimer:
+    """Chronomètre inactif (mesures désactivées)"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer:
+    """Chronomètre d'une étape, enregistré dans son histogramme à la sortie"""
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, perf_counter() - self.start)
+        return False
+
+def enable(flag=True):
+    """Active (ou désactive) les mesures"""
+    global _enabled
+    _enabled = flag
+
+def is_enabled():
+    return _enabled
+
+def timer(stage):
+    """
+    Chronomètre une étape :
+
+        with metrics.timer('find_contours'):
+            ...
+
+    Quand les mesures sont désactivées, un chronomètre inactif partagé est
+    retourné et le coût se limite à un appel de fonction.
+    """
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(stage)
+
+def observe(stage, seconds):
+    """Enregistre une durée (en secondes) dans l'histogramme d'une étape"""
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(BUCKETS)}
+            _histograms[stage] = histogram
+        histogram["count"] += 1
+        histogram["sum"] += seconds
+        histogram["max"] = max(histogram["max"], seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][i] += 1
+                break
+
+def count(name, value=1):
+    """Incrémente un compteur"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def drain():
+    """
+    Retire les mesures enregistrées depuis l'appel précédent (None si les
+    mesures sont désactivées), pour les transmettre à un autre processus
+    (voir merge).
+    """
+    global _histograms, _counters
+    if not _enabled:
+        return None
+    with _lock:
+        delta = {"histograms": _histograms, "counters": _counters}
+        _histograms = {}
+        _counters = {}
+    return delta
+
+def merge(delta):
+    """Ajoute aux mesures celles retirées d'un autre processus par drain()"""
+    if not _enabled or not delta:
+        return
+    with _lock:
+        for stage, other in delta["histograms"].items():
+            histogram = _histograms.get(stage)
+            if histogram is None:
+                _histograms[stage] = {"count": other["count"], "sum": other["sum"], "max": other["max"],
+                                      "buckets": list(other["buckets"])}
+                continue
+            histogram["count"] += other["count"]
+            histogram["sum"] += other["sum"]
+            histogram["max"] = max(histogram["max"], other["max"])
+            histogram["buckets"] = [a + b for a, b in zip(histogram["buckets"], other["buckets"])]
+        for name, value in delta["counters"].items():
+            _counters[name] = _counters.get(name, 0) + value
+
+def snapshot():
+    """
+    Copie des mesures : histogrammes (buckets cumulés, comme Prometheus) et
+    compteurs.
+    """
+    with _lock:
+        stages = {}
+        for stage, histogram in _histograms.items():
+            cumulative = []
+            total = 0
+            for value in histogram["buckets"]:
+                total += value
+                cumulative.append(total)
+            stages[stage] = {
+                "count": histogram["count"],
+                "sum_seconds": histogram["sum"],
+                "mean_ms": histogram["sum"] / histogram["count"] * 1000,
+                "max_ms": histogram["max"] * 1000,
+                "buckets": dict(zip([str(bound) for bound in BUCKETS], cumulative))
+            }
+        return {"stages": stages, "counters": dict(_counters)}
+
+def to_prometheus():
+    """Mesures au format texte Prometheus"""
+    data = snapshot()
+    lines = [
+        "# HELP bbox_stage_seconds Latence des étapes de traitement",
+        "# TYPE bbox_stage_seconds histogram"
+    ]
+    for stage, histogram in sorted(data["stages"].items()):
+        for bound, value in histogram["buckets"].items():
+            lines.append(f'bbox_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {value}')
+        lines.append(f'bbox_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram["count"]}')
+        lines.append(f'bbox_stage_seconds_sum{{stage="{stage}"}} {histogram["sum_seconds"]}')
+        lines.append(f'bbox_stage_seconds_count{{stage="{stage}"}} {histogram["count"]}')
+    lines.append("# HELP bbox_events_total Compteurs d'événements")
+    lines.append("# TYPE bbox_events_total counter")
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f'bbox_events_total{{name="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+def dump(path):
+    """
+    Écrit les mesures dans un fichier : format texte Prometheus si le nom se
+    termine par .prom, JSON sinon.
+    """
+    if not _enabled or not path:
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith('.prom'):
+            f.write(to_prometheus())
+        else:
+            json.dump(snapshot(), f, indent=2)
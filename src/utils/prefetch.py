@@ -0,0 +1,103 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.batch import STATUS_OK, load_and_extract
+from utils.bbox_utils import render_overlay, draw_boxes, resize_for_display
+from utils.triage import frame_signals
+from utils import metrics
+
+def load_frame(task, alpha=0.3, cache=None, memo=None, display_size=(800, 600), signals=False):
+    """
+    Charge une image, extrait ses boxes et pré-calcule ses visualisations.
+
+    Args:
+        task: Tuple (scan_folder, img_name, img_path, mask_path, params)
+        alpha: Transparence utilisée pour pré-calculer la superposition
+        cache: BoxCache optionnel
+        memo: FingerprintMemo optionnel (masques identiques d'un même scan)
+        display_size: Taille d'affichage à laquelle pré-calculer les visualisations
+        signals: Calcule aussi les signaux du triage automatique (voir
+            utils/triage.py), seulement utiles quand il est activé
+    Returns:
+        Dictionnaire décrivant l'image prête à être affichée
+    """
+    scan_folder, img_name = task[0], task[1]
+    status, image, mask, boxes, fingerprint = load_and_extract(task, cache, memo)
+
+    frame = {
+        "scan": scan_folder,
+        "image_name": img_name,
+        "status": status,
+        "image": image,
+        "mask": mask,
+        "boxes": boxes,
+        "fingerprint": fingerprint,
+        "display_size": None,
+        "display_image": None,
+        "display_mask": None,
+        "alpha": None,
+        "overlay": None,
+        "bbox_img": None,
+        "signals": None
+    }
+    if status == STATUS_OK:
+        with metrics.timer('display_resize'):
+            display_image, display_mask, display_boxes = resize_for_display(image, mask, boxes, display_size)
+        frame["display_size"] = display_size
+        frame["display_image"] = display_image
+        frame["display_mask"] = display_mask
+        frame["alpha"] = alpha
+        with metrics.timer('overlay'):
+            frame["overlay"] = render_overlay(display_image, display_mask, alpha)
+            frame["bbox_img"] = draw_boxes(display_image, display_boxes)
+        if signals:
+            with metrics.timer('triage_signals'):
+                frame["signals"] = frame_signals(mask, boxes, (task[4] or {}).get("threshold", 127))
+    return frame
+
+class FramePrefetcher:
+    """
+    File bornée qui prépare en arrière-plan les N prochaines images
+    (lecture, extraction des boxes et visualisations).
+
+    OpenCV libère le GIL pendant la lecture et les traitements, un pool de
+    threads suffit donc à décharger le thread Tk.
+    """
+    def __init__(self, tasks, depth=8, workers=2, alpha=0.3, cache=None, memo=None,
+                 display_size=(800, 600), signals=False):
+        self.tasks = iter(tasks)
+        self.depth = depth
+        self.alpha = alpha
+        self.cache = cache
+        self.memo = memo
+        self.display_size = display_size
+        self.signals = signals
+        self.pending = deque()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._fill()
+
+    def _fill(self):
+        """Soumet des tâches jusqu'à avoir N images en préparation"""
+        while len(self.pending) < self.depth:
+            task = next(self.tasks, None)
+            if task is None:
+                break
+            self.pending.append(self.executor.submit(load_frame, task, self.alpha, self.cache, self.memo,
+                                                     self.display_size, self.signals))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.pending:
+            raise StopIteration
+        future = self.pending.popleft()
+        self._fill()
+        # Temps pendant lequel l'interface attend une image pas encore prête
+        with metrics.timer('prefetch_wait'):
+            return future.result()
+
+    def close(self):
+        """Annule les tâches en attente et arrête le pool"""
+        self.pending.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -16,7 +16,9 @@ TEXTS = {
         'finished': 'Termine!',
         'saved_boxes': 'bounding boxes sauvegardees sur',
         'processed_images': 'images traitees',
-        'manual_fix': 'cas à corriger manuellement. Voir'
+        'manual_fix': 'cas à corriger manuellement. Voir',
+        'loading': 'Chargement du dataset...',
+        'journal_error': 'Erreur d\'ecriture des resultats (nouvel essai en cours) :'
     },
     'en': {
         'scan': 'Scan',
@@ -35,7 +37,9 @@ TEXTS = {
         'finished': 'Finished!',
         'saved_boxes': 'bounding boxes saved out of',
         'processed_images': 'processed images',
-        'manual_fix': 'cases to fix manually. See'
+        'manual_fix': 'cases to fix manually. See',
+        'loading': 'Loading dataset...',
+        'journal_error': 'Error writing results (retrying):'
     },
     'sv': {
         'scan': 'Skanning',
@@ -54,6 +58,8 @@ TEXTS = {
         'finished': 'Fardig!',
         'saved_boxes': 'markeringsrutor sparade av',
         'processed_images': 'bearbetade bilder',
-        'manual_fix': 'fall att fixa manuellt. Se'
+        'manual_fix': 'fall att fixa manuellt. Se',
+        'loading': 'Laddar dataset...',
+        'journal_error': 'Fel vid skrivning av resultat (forsoker igen):'
     }
 } 
\ No newline at end of file
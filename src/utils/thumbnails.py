@@ -0,0 +1,154 @@
+import os
+import json
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from utils.batch import STATUS_OK, STATUS_READ_ERROR, load_and_extract
+from utils.bbox_utils import EXTRACTION_VERSION, render_overlay, draw_boxes, resize_for_display
+from utils.box_cache import BoxCache
+from utils.atomic import atomic_open
+from utils import metrics
+
+def render_thumbnail(image, mask, boxes, size=160, alpha=0.3):
+    """
+    Vignette d'une image : superposition du masque et boxes tracées, réduite
+    pour tenir dans un carré de size pixels.
+    """
+    small_image, small_mask, small_boxes = resize_for_display(image, mask, boxes, (size, size))
+    return draw_boxes(render_overlay(small_image, small_mask, alpha), small_boxes, thickness=1)
+
+class ThumbnailCache:
+    """
+    Cache sur disque des vignettes (JPEG, un fichier par image), avec le
+    statut et les boxes de l'image dans un fichier .json voisin.
+
+    Les vignettes d'une configuration (paramètres d'extraction, taille,
+    transparence) sont rangées dans leur propre sous-dossier. Une vignette
+    est à jour tant que la signature de l'image et du masque
+    (BoxCache.signature) n'a pas changé ; elle est réutilisée sans BoxCache.
+    """
+    def __init__(self, directory, params=None, size=160, alpha=0.3):
+        self.size = size
+        self.alpha = alpha
+        config = json.dumps({"params": params or {}, "size": size, "alpha": alpha,
+                             "version": EXTRACTION_VERSION}, sort_keys=True)
+        self.directory = os.path.join(directory, hashlib.blake2b(config.encode(), digest_size=6).hexdigest())
+
+    def path(self, scan_folder, img_name):
+        return os.path.join(self.directory, scan_folder, img_name + ".jpg")
+
+    def get(self, task):
+        """
+        Returns:
+            Tuple (vignette, statut, boxes) si la vignette est à jour, None sinon
+        """
+        scan_folder, img_name, img_path, mask_path, params = task
+        path = self.path(scan_folder, img_name)
+        try:
+            with open(path + ".json", 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        signature = BoxCache.signature(img_path, mask_path, params)
+        if signature is None or entry.get("signature") != signature:
+            return None
+        thumbnail = None
+        if entry["status"] == STATUS_OK:
+            thumbnail = cv2.imread(path)
+            if thumbnail is None:
+                return None
+        return thumbnail, entry["status"], entry["boxes"]
+
+    def put(self, task, thumbnail, status, boxes):
+        """
+        Enregistre la vignette d'une tâche, avec son statut et ses boxes
+        (thumbnail vaut None pour une image sans objet : seul le statut est gardé).
+        """
+        scan_folder, img_name, img_path, mask_path, params = task
+        path = self.path(scan_folder, img_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if thumbnail is not None:
+            cv2.imwrite(path, thumbnail, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        entry = {"signature": BoxCache.signature(img_path, mask_path, params), "status": status, "boxes": boxes}
+        with atomic_open(path + ".json", 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+
+def load_tile(task, thumbnails, cache=None, memo=None):
+    """
+    Prépare une case de la grille : vignette et boxes de l'image.
+
+    La vignette et les boxes viennent du cache des vignettes quand il est à
+    jour ; sinon l'image est lue et extraite (en consultant le BoxCache
+    optionnel), puis la vignette est enregistrée. Les erreurs de lecture ne
+    sont pas mises en cache.
+
+    Returns:
+        Dictionnaire (scan, image_name, status, boxes, thumbnail)
+    """
+    scan_folder, img_name = task[0], task[1]
+    tile = {"scan": scan_folder, "image_name": img_name}
+
+    known = thumbnails.get(task)
+    if known is not None:
+        metrics.count('thumbnail_hits')
+        thumbnail, status, boxes = known
+        tile.update(status=status, boxes=boxes, thumbnail=thumbnail)
+        return tile
+
+    status, image, mask, boxes, _ = load_and_extract(task, cache, memo)
+    thumbnail = None
+    if status == STATUS_OK:
+        with metrics.timer('thumbnail'):
+            thumbnail = render_thumbnail(image, mask, boxes, thumbnails.size, thumbnails.alpha)
+    if status != STATUS_READ_ERROR:
+        thumbnails.put(task, thumbnail, status, boxes)
+    tile.update(status=status, boxes=boxes, thumbnail=thumbnail)
+    return tile
+
+class ThumbnailPager:
+    """
+    Découpe les tâches en pages de page_size images et prépare en
+    arrière-plan les depth pages suivantes, pour un changement de page
+    immédiat.
+    """
+    def __init__(self, tasks, thumbnails, page_size=16, depth=2, workers=2, cache=None, memo=None):
+        self.tasks = iter(tasks)
+        self.thumbnails = thumbnails
+        self.page_size = page_size
+        self.depth = depth
+        self.cache = cache
+        self.memo = memo
+        self.pending = deque()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._fill()
+
+    def _fill(self):
+        """Soumet les pages suivantes jusqu'à en avoir depth en préparation"""
+        while len(self.pending) < self.depth:
+            page = []
+            for task in self.tasks:
+                page.append(self.executor.submit(load_tile, task, self.thumbnails, self.cache, self.memo))
+                if len(page) >= self.page_size:
+                    break
+            if not page:
+                break
+            self.pending.append(page)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.pending:
+            raise StopIteration
+        page = self.pending.popleft()
+        self._fill()
+        with metrics.timer('page_wait'):
+            return [future.result() for future in page]
+
+    def close(self):
+        """Annule les pages en attente et arrête le pool"""
+        self.pending.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
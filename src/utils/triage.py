@@ -0,0 +1,100 @@
+import cv2
+
+# Nombre de boxes au-delà duquel une image devient douteuse
+MAX_CONFIDENT_BOXES = 3
+# Remplissage attendu d'une lésion dans sa box (une ellipse remplit π/4 ≈ 0.79)
+EXPECTED_FILL = 0.6
+# Poids des signaux dans le score
+WEIGHTS = {"count": 1.0, "fill": 1.0, "contour": 1.0, "agreement": 1.0}
+
+def frame_signals(mask, boxes, threshold=127):
+    """
+    Signaux de qualité d'une image, calculés à partir du masque et des boxes
+    déjà extraites.
+
+    Returns:
+        Dictionnaire : nombre de boxes, plus faible remplissage du masque dans
+        une box (pixels du masque / aire de la box), plus faible rapport aire
+        du plus grand contour / aire de la box
+    """
+    fills = []
+    contours_ratios = []
+    for box in boxes:
+        area = box["width"] * box["height"]
+        if area <= 0:
+            continue
+        roi = mask[box["y"]:box["y"] + box["height"], box["x"]:box["x"] + box["width"]]
+        roi = (roi > threshold).astype('uint8')
+        fills.append(cv2.countNonZero(roi) / area)
+        contours, _ = cv2.findContours(roi, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        largest = max((cv2.contourArea(contour) for contour in contours), default=0.0)
+        contours_ratios.append(largest / area)
+    return {
+        "count": len(boxes),
+        "fill": min(fills, default=0.0),
+        "contour": min(contours_ratios, default=0.0)
+    }
+
+def box_iou(a, b):
+    """Intersection sur union de deux boxes"""
+    width = min(a["x"] + a["width"], b["x"] + b["width"]) - max(a["x"], b["x"])
+    height = min(a["y"] + a["height"], b["y"] + b["height"]) - max(a["y"], b["y"])
+    if width <= 0 or height <= 0:
+        return 0.0
+    inter = width * height
+    return inter / (a["width"] * a["height"] + b["width"] * b["height"] - inter)
+
+def boxes_agreement(boxes, previous_boxes):
+    """
+    Accord avec les boxes de l'image précédente : moyenne, sur les boxes des
+    deux images, de la meilleure IoU avec l'autre image.
+    """
+    if not boxes or not previous_boxes:
+        return 0.0
+    best = [max(box_iou(box, other) for other in previous_boxes) for box in boxes]
+    best += [max(box_iou(other, box) for box in boxes) for other in previous_boxes]
+    return sum(best) / len(best)
+
+def triage_score(signals, agreement=None):
+    """
+    Score de confiance entre 0 et 1 (moyenne pondérée des signaux) ;
+    l'accord avec l'image précédente n'est compté que s'il est connu.
+    """
+    count = signals["count"]
+    scores = {
+        "count": 1.0 if 1 <= count <= MAX_CONFIDENT_BOXES else (0.0 if count == 0 else MAX_CONFIDENT_BOXES / count),
+        "fill": min(1.0, signals["fill"] / EXPECTED_FILL),
+        "contour": min(1.0, signals["contour"] / EXPECTED_FILL)
+    }
+    if agreement is not None:
+        scores["agreement"] = agreement
+    total = sum(WEIGHTS[name] for name in scores)
+    return sum(WEIGHTS[name] * value for name, value in scores.items()) / total
+
+class AutoTriage:
+    """
+    Validation automatique des images sûres.
+
+    Les images sont présentées dans l'ordre du dataset ; l'accord est mesuré
+    avec l'image précédente du même scan. Une image dont le score atteint le
+    seuil est validée sans passer par le relecteur.
+    """
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.previous = None
+
+    def score(self, frame):
+        """Score d'une image préparée (voir load_frame), dans l'ordre du dataset"""
+        agreement = None
+        if self.previous is not None and self.previous[0] == frame["scan"]:
+            agreement = boxes_agreement(frame["boxes"], self.previous[1])
+        self.previous = (frame["scan"], frame["boxes"])
+        return triage_score(frame["signals"], agreement)
+
+    def accept(self, frame):
+        """
+        Returns:
+            Tuple (image validée automatiquement, score)
+        """
+        score = self.score(frame)
+        return score >= self.threshold, score
@@ -0,0 +1,163 @@
+import time
+import secrets
+import threading
+from collections import deque
+
+import cv2
+
+from utils.batch import STATUS_OK
+from utils import metrics
+
+class WorkQueue:
+    """
+    File de travail partagée entre plusieurs relecteurs.
+
+    Chaque image est prêtée (lease) à un seul relecteur pour une durée
+    limitée. Une image dont le prêt expire sans décision est remise en tête
+    de file et proposée au relecteur suivant ; une décision arrivée après
+    l'expiration est refusée. Toutes les décisions sont écrites dans le même
+    journal, par ce seul processus.
+    """
+    def __init__(self, frames, journal, manifest, lease_timeout=300, triage=None):
+        """
+        Args:
+            frames: Itérateur d'images préparées (FramePrefetcher)
+            journal: ValidationJournal partagé
+            manifest: DatasetManifest, pour marquer les images traitées
+            lease_timeout: Durée d'un prêt, en secondes
+            triage: AutoTriage optionnel ; les images sûres sont validées
+                sans être prêtées
+        """
+        self.frames = frames
+        self.journal = journal
+        self.manifest = manifest
+        self.lease_timeout = lease_timeout
+        self.triage = triage
+        self.leases = {}
+        self.requeued = deque()
+        self.exhausted = False
+        self.counts = {"validated": 0, "rejected": 0, "errors": 0, "auto_accepted": 0}
+        self.lock = threading.Lock()
+        self.source_lock = threading.Lock()
+
+    def _expire(self, now):
+        """Remet en file les images dont le prêt a expiré"""
+        for token, lease in list(self.leases.items()):
+            if lease["expires"] <= now:
+                del self.leases[token]
+                self.requeued.append(lease["item"])
+                metrics.count('leases_expired')
+
+    def _record(self, scan, image, valid, boxes=None, triage_score=None):
+        """Écrit une décision dans le journal (appelé avec self.lock)"""
+        self.manifest.mark(f"{scan}/{image}")
+        self.journal.append(scan, image, valid, boxes, triage_score=triage_score)
+
+    def _next_item(self):
+        """
+        Prochaine image à prêter : d'abord les prêts expirés, puis la suite
+        du dataset. Les images illisibles sont rejetées et les images sûres
+        validées au passage.
+        """
+        with self.lock:
+            self._expire(time.monotonic())
+            if self.requeued:
+                return self.requeued.popleft()
+
+        with self.source_lock:
+            for frame in self.frames:
+                if frame["status"] != STATUS_OK:
+                    with self.lock:
+                        self._record(frame["scan"], frame["image_name"], False)
+                        self.counts["errors"] += 1
+                    continue
+                if self.triage is not None:
+                    accepted, score = self.triage.accept(frame)
+                    if accepted:
+                        with self.lock:
+                            self._record(frame["scan"], frame["image_name"], True, frame["boxes"], score)
+                            self.counts["auto_accepted"] += 1
+                        metrics.count('frames_auto_accepted')
+                        continue
+                # Seules les visualisations encodées sont conservées
+                with metrics.timer('frame_encode'):
+                    overlay = cv2.imencode('.png', frame["overlay"])[1].tobytes()
+                    bbox_img = cv2.imencode('.png', frame["bbox_img"])[1].tobytes()
+                return {
+                    "scan": frame["scan"],
+                    "image": frame["image_name"],
+                    "boxes": frame["boxes"],
+                    "image_size": (frame["image"].shape[1], frame["image"].shape[0]),
+                    "overlay": overlay,
+                    "bbox_img": bbox_img
+                }
+            self.exhausted = True
+            return None
+
+    def lease(self, reviewer=None):
+        """
+        Prête la prochaine image à un relecteur.
+
+        Returns:
+            Tuple (jeton, image) ; (None, None) si aucune image n'est
+            disponible pour l'instant (voir done())
+        """
+        item = self._next_item()
+        if item is None:
+            return None, None
+        token = secrets.token_hex(8)
+        with self.lock:
+            self.leases[token] = {
+                "item": item,
+                "reviewer": reviewer,
+                "expires": time.monotonic() + self.lease_timeout
+            }
+        metrics.count('leases')
+        return token, item
+
+    def get(self, token):
+        """Image prêtée sous ce jeton, ou None si le prêt a expiré"""
+        with self.lock:
+            lease = self.leases.get(token)
+            if lease is None or lease["expires"] <= time.monotonic():
+                return None
+            return lease["item"]
+
+    def renew(self, token):
+        """Prolonge un prêt en cours. Returns: False si le prêt a expiré"""
+        with self.lock:
+            lease = self.leases.get(token)
+            if lease is None or lease["expires"] <= time.monotonic():
+                return False
+            lease["expires"] = time.monotonic() + self.lease_timeout
+            return True
+
+    def complete(self, token, valid):
+        """
+        Enregistre la décision d'un relecteur sur l'image prêtée.
+
+        Returns:
+            False si le prêt a expiré (l'image a pu être prêtée à un autre
+            relecteur) ; la décision n'est alors pas enregistrée
+        """
+        with self.lock:
+            lease = self.leases.get(token)
+            if lease is None or lease["expires"] <= time.monotonic():
+                return False
+            del self.leases[token]
+            item = lease["item"]
+            self._record(item["scan"], item["image"], valid, item["boxes"] if valid else None)
+            self.counts["validated" if valid else "rejected"] += 1
+        metrics.count('frames_validated' if valid else 'frames_rejected')
+        return True
+
+    def done(self):
+        """Toutes les images ont reçu une décision"""
+        with self.lock:
+            return self.exhausted and not self.leases and not self.requeued
+
+    def stats(self):
+        """État de la file"""
+        with self.lock:
+            return dict(self.counts, leased=len(self.leases), requeued=len(self.requeued),
+                        exhausted=self.exhausted)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les modules s'importent depuis src/ (from utils.bbox_utils import ...)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from utils import bbox_utils
+from utils.bbox_utils import (
+    VECTORIZED_FILTER_MIN_BOXES,
+    filter_contained_boxes,
+    filter_contained_boxes_vectorized,
+    should_remove_box,
+)
+
+def filter_loop(boxes):
+    """Filtrage de référence : double boucle sur should_remove_box"""
+    return [box for i, box in enumerate(boxes)
+            if not any(i != j and should_remove_box(box, other) for j, other in enumerate(boxes))]
+
+def random_boxes(rng, count, extent):
+    """
+    Boxes aléatoires dans un petit espace, pour provoquer inclusions,
+    doublons et intersections à la limite du seuil de 10%.
+    """
+    boxes = []
+    for _ in range(count):
+        w = rng.randint(1, extent)
+        h = rng.randint(1, extent)
+        boxes.append({"x": rng.randint(0, extent), "y": rng.randint(0, extent), "width": w, "height": h})
+    return boxes
+
+@pytest.mark.parametrize("seed", range(3))
+def test_vectorized_matches_loop(seed):
+    rng = random.Random(seed)
+    for _ in range(1000):
+        boxes = random_boxes(rng, rng.randint(1, 60), rng.choice((4, 16, 64)))
+        assert filter_contained_boxes_vectorized(boxes) == filter_loop(boxes)
+
+def test_vectorized_matches_loop_across_chunks():
+    rng = random.Random(42)
+    for _ in range(50):
+        boxes = random_boxes(rng, rng.randint(2, 40), 32)
+        assert filter_contained_boxes_vectorized(boxes, chunk_size=7) == filter_loop(boxes)
+
+def test_duplicate_boxes_remove_each_other():
+    box = {"x": 1, "y": 2, "width": 3, "height": 4}
+    assert filter_contained_boxes_vectorized([dict(box), dict(box)]) == []
+    assert filter_loop([dict(box), dict(box)]) == []
+
+@pytest.mark.parametrize("count", [VECTORIZED_FILTER_MIN_BOXES - 1, VECTORIZED_FILTER_MIN_BOXES,
+                                   VECTORIZED_FILTER_MIN_BOXES + 1])
+def test_switch_over_keeps_results(count, monkeypatch):
+    rng = random.Random(count)
+    calls = []
+    vectorized = bbox_utils.filter_contained_boxes_vectorized
+    monkeypatch.setattr(bbox_utils, "filter_contained_boxes_vectorized",
+                        lambda boxes: calls.append(len(boxes)) or vectorized(boxes))
+    for _ in range(100):
+        boxes = random_boxes(rng, count, 64)
+        assert filter_contained_boxes(boxes) == filter_loop(boxes)
+    assert bool(calls) == (count >= VECTORIZED_FILTER_MIN_BOXES)
+
+def test_empty():
+    assert filter_contained_boxes([]) == []